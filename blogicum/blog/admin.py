@@ -1,15 +1,106 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
 
 from blog.models import Category, Comment, Location, Post
+from blog.search import find_post_ids
+from blogicum.constants import ADMIN_SEARCH_LIMIT
 
 
-class PostAdmin(admin.ModelAdmin):
-    list_display = ('title', 'author', 'created_at')
-    list_filter = ('author', 'created_at')
-    search_fields = ('title', 'author__name')
+def estimate_rows(queryset):
+    """Примерное число строк таблицы без COUNT(*); None, если не оценить."""
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            # Без удалений совпадает с числом строк и берётся из индекса.
+            cursor.execute(
+                f'SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}'
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [table],
+            )
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s',
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор списков админки без полного COUNT(*) по большой таблице.
+
+    Без фильтров число строк оценивается по статистике таблицы; с
+    фильтрами считается не больше BLOG_ADMIN_COUNT_LIMIT строк.
+    """
+
+    @cached_property
+    def count(self):
+        limit = settings.BLOG_ADMIN_COUNT_LIMIT
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_rows(queryset)
+            if estimate is not None and estimate > limit:
+                return estimate
+        return queryset.order_by()[:limit].count()
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """Общие настройки списков, которые листают миллионы строк."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class PostAdmin(ScalableAdmin):
+    list_display = (
+        'title', 'author', 'category', 'is_published', 'pub_date',
+        'comment_count',
+    )
+    list_select_related = ('author', 'category')
+    list_filter = ('is_published', 'category')
+    # Автор ищется точным совпадением по уникальному username,
+    # заголовок и текст — через поисковый индекс постов.
+    search_fields = ('=author__username',)
+    raw_id_fields = ('author',)
+    date_hierarchy = 'pub_date'
+    ordering = ('-pub_date', '-id')
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(
+            Q(author__username=search_term)
+            | Q(pk__in=find_post_ids(search_term, ADMIN_SEARCH_LIMIT))
+        ), False
+
+
+class CommentAdmin(ScalableAdmin):
+    list_display = ('text', 'post', 'author', 'created_at')
+    list_select_related = ('post', 'author')
+    search_fields = ('=author__username',)
+    raw_id_fields = ('post', 'author')
+    date_hierarchy = 'created_at'
+    ordering = ('-created_at', '-id')
+
+    def get_queryset(self, request):
+        # У поста в списке нужен только заголовок, не весь текст.
+        return super().get_queryset(request).defer('post__text')
 
 
 admin.site.register(Post, PostAdmin)
+admin.site.register(Comment, CommentAdmin)
 admin.site.register(Category)
 admin.site.register(Location)
-admin.site.register(Comment)
@@ -0,0 +1,387 @@
+import math
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from importlib import import_module
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
+from django.test import Client
+from django.urls import URLPattern, URLResolver, reverse
+
+from blog.models import Category, Comment, FeedEntry, Post
+from blog.search import tokenize
+from blog.sqlite import apply_pragmas
+from blogicum.constants import TOTAL_POST
+from blogicum.querycount import record_queries
+
+User = get_user_model()
+
+URLCONFS = ('blog.urls', 'pages.urls')
+
+ANONYMOUS = 'anonymous'
+READER = 'reader'
+OWNER = 'owner'
+
+# Страницы, открытые всем, меряются и анонимно, и под пользователем:
+# у анонимов работает кеш страниц, у вошедших — нет.
+PUBLIC = (ANONYMOUS, READER)
+
+SAMPLE_SIZE = 200
+
+BENCH_TABLE = 'bench_comment'
+
+
+def url_names(urlconfs=URLCONFS):
+    """Имена всех маршрутов модулей urls с пространством имён."""
+    names = []
+
+    def walk(patterns, namespace):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns, namespace)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                names.append(f'{namespace}:{pattern.name}')
+
+    for urlconf in urlconfs:
+        module = import_module(urlconf)
+        walk(module.urlpatterns, module.app_name)
+    return names
+
+
+class Sample:
+    """Случайные объекты набора данных для подстановки в URL."""
+
+    def __init__(self, rng, size=SAMPLE_SIZE):
+        self.rng = rng
+        self.posts = list(FeedEntry.objects.filter(is_live=True).order_by(
+            '?'
+        ).values_list('post_id', 'author_id')[:size])
+        self.comments = list(Comment.objects.order_by('?').values_list(
+            'post_id', 'pk', 'author_id'
+        )[:size])
+        self.categories = [
+            (slug, max(1, math.ceil(total / TOTAL_POST)))
+            for slug, total in Category.objects.filter(
+                is_published=True
+            ).annotate(
+                total=Count(
+                    'feed_entries', filter=Q(feed_entries__is_live=True)
+                )
+            ).values_list('slug', 'total')
+        ]
+        self.usernames = list(User.objects.filter(
+            pk__in=[author_id for _, author_id in self.posts]
+        ).values_list('username', flat=True))
+        self.reader = User.objects.exclude(
+            pk__in=[author_id for _, author_id in self.posts]
+        ).first() or User.objects.first()
+        self.terms = [
+            term for title in Post.objects.filter(
+                pk__in=[post_id for post_id, _ in self.posts]
+            ).values_list('title', flat=True)
+            for term in tokenize(title)
+        ] or ['blog']
+        self.pages = max(1, math.ceil(
+            FeedEntry.objects.filter(is_live=True).count() / TOTAL_POST
+        ))
+
+    def post(self):
+        return self.rng.choice(self.posts)
+
+    def comment(self):
+        return self.rng.choice(self.comments)
+
+    def page(self, pages=None):
+        # Чаще всего читают первые страницы ленты.
+        return min(pages or self.pages, int(self.rng.paretovariate(1.2)))
+
+    def category(self):
+        slug, pages = self.rng.choice(self.categories)
+        return {'category_slug': slug}, {'page': self.page(pages)}, None
+
+
+def post_route(sample):
+    post_id, author_id = sample.post()
+    return {'post_id': post_id}, {}, author_id
+
+
+def comment_route(sample):
+    post_id, comment_id, author_id = sample.comment()
+    return {'post_id': post_id, 'comment_id': comment_id}, {}, author_id
+
+
+# Имя маршрута -> (режимы, построитель). Построитель возвращает
+# аргументы URL, параметры запроса и id владельца объекта.
+ROUTES = {
+    'blog:index': (PUBLIC, lambda sample: (
+        {}, {'page': sample.page()}, None
+    )),
+    'blog:category_posts': (PUBLIC, lambda sample: sample.category()),
+    'blog:profile': (PUBLIC, lambda sample: (
+        {'username': sample.rng.choice(sample.usernames)}, {}, None
+    )),
+    'blog:post_detail': (PUBLIC, post_route),
+    'blog:post_comments': (PUBLIC, post_route),
+    'blog:search': (PUBLIC, lambda sample: (
+        {}, {'q': sample.rng.choice(sample.terms)}, None
+    )),
+    'blog:create_post': ((READER,), lambda sample: ({}, {}, None)),
+    'blog:add_comment': ((READER,), post_route),
+    'blog:edit_post': ((OWNER,), post_route),
+    'blog:delete_post': ((OWNER,), post_route),
+    'blog:edit_comment': ((OWNER,), comment_route),
+    'blog:delete_comment': ((OWNER,), comment_route),
+    'blog:edit_profile': ((READER,), lambda sample: ({}, {}, None)),
+    'pages:about': (PUBLIC, lambda sample: ({}, {}, None)),
+    'pages:rules': (PUBLIC, lambda sample: ({}, {}, None)),
+}
+
+
+class Clients:
+    """Тестовые клиенты: анонимный, читатель и владельцы объектов."""
+
+    def __init__(self, reader):
+        self.anonymous = Client()
+        self.reader = self.login(reader.pk)
+        self.owners = {}
+
+    @staticmethod
+    def login(user_id):
+        client = Client()
+        client.force_login(User.objects.get(pk=user_id))
+        return client
+
+    def get(self, mode, owner_id):
+        if mode == ANONYMOUS:
+            return self.anonymous
+        if mode == READER:
+            return self.reader
+        if owner_id not in self.owners:
+            self.owners[owner_id] = self.login(owner_id)
+        return self.owners[owner_id]
+
+
+def percentile(values, percent):
+    """Процентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(timings, queries, sizes, statuses):
+    return {
+        'requests': len(timings),
+        'p50_ms': round(percentile(timings, 50) * 1e3, 3),
+        'p95_ms': round(percentile(timings, 95) * 1e3, 3),
+        'p99_ms': round(percentile(timings, 99) * 1e3, 3),
+        'queries_mean': round(sum(queries) / len(queries), 2),
+        'queries_max': max(queries),
+        'bytes_mean': round(sum(sizes) / len(sizes)),
+        'statuses': {
+            str(status): count for status, count in sorted(statuses.items())
+        },
+    }
+
+
+def run_benchmark(requests=200, warmup=20, names=None, random_seed=0):
+    """Прогон всех маршрутов через тестовый клиент.
+
+    Возвращает {'<имя> [<режим>]': сводка}; маршруты без построителя
+    в ROUTES попадают в результат с пометкой skipped.
+    """
+    rng = random.Random(random_seed)
+    sample = Sample(rng)
+    clients = Clients(sample.reader)
+    results = {}
+    for name in names or url_names():
+        if name not in ROUTES:
+            results[name] = {'skipped': 'нет построителя URL'}
+            continue
+        modes, build = ROUTES[name]
+        for mode in modes:
+            timings, queries, sizes = [], [], []
+            statuses = Counter()
+            for number in range(warmup + requests):
+                kwargs, params, owner_id = build(sample)
+                client = clients.get(mode, owner_id)
+                path = reverse(name, kwargs=kwargs)
+                # record_queries, а не обёртка соединения основного
+                # потока: асинхронные представления ходят в БД из пула.
+                with record_queries() as log:
+                    started = time.perf_counter()
+                    response = client.get(path, params)
+                    elapsed = time.perf_counter() - started
+                if number < warmup:
+                    continue
+                timings.append(elapsed)
+                queries.append(len(log))
+                sizes.append(len(response.content))
+                statuses[response.status_code] += 1
+            results[f'{name} [{mode}]'] = summarize(
+                timings, queries, sizes, statuses
+            )
+    return results
+
+
+def compare(baseline, current):
+    """Строки сравнения двух прогонов: изменение p50/p95/p99 и запросов."""
+    rows = []
+    for key, new in current.items():
+        old = baseline.get(key)
+        if not old or 'skipped' in old or 'skipped' in new:
+            continue
+        row = {'route': key}
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            row[metric] = (
+                new[metric] / old[metric] - 1 if old[metric] else None
+            )
+        row['queries'] = new['queries_mean'] - old['queries_mean']
+        row['bytes'] = new['bytes_mean'] - old['bytes_mean']
+        rows.append(row)
+    return rows
+
+
+def connect_sqlite(path, pragmas):
+    # isolation_level=None: транзакции открываются явно, как в atomic().
+    db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    apply_pragmas(db.cursor(), pragmas)
+    return db
+
+
+class WriteRun:
+    """Общее состояние потоков run_write_benchmark."""
+
+    def __init__(self, path, pragmas, parties):
+        self.path, self.pragmas = path, pragmas
+        self.start = threading.Barrier(parties)
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.locked = self.reads = 0
+
+    def connect(self):
+        return connect_sqlite(self.path, self.pragmas)
+
+
+def create_bench_table(path, pragmas):
+    db = connect_sqlite(path, pragmas)
+    db.execute(
+        f'CREATE TABLE IF NOT EXISTS {BENCH_TABLE} ('
+        'id INTEGER PRIMARY KEY, post_id INTEGER, author_id INTEGER, '
+        'text TEXT, created_at TEXT)'
+    )
+    db.execute(
+        f'CREATE INDEX IF NOT EXISTS {BENCH_TABLE}_post '
+        f'ON {BENCH_TABLE} (post_id, created_at)'
+    )
+    db.close()
+
+
+def write_transaction(connection, number, index, rows):
+    """Одна транзакция из rows вставок; False, если база была занята."""
+    now = datetime.now(timezone.utc).isoformat()
+    try:
+        connection.execute('BEGIN')
+        connection.executemany(
+            f'INSERT INTO {BENCH_TABLE} '
+            '(post_id, author_id, text, created_at) '
+            'VALUES (?, ?, ?, ?)',
+            [(index % 100, number, 'Комментарий ' * 8, now)] * rows,
+        )
+        connection.execute('COMMIT')
+    except sqlite3.OperationalError as error:
+        if 'locked' not in str(error):
+            raise
+        if connection.in_transaction:
+            connection.execute('ROLLBACK')
+        return False
+    return True
+
+
+def bench_writer(run, number, transactions, rows):
+    connection = run.connect()
+    own, locked = [], 0
+    run.start.wait()
+    for index in range(transactions):
+        began = time.perf_counter()
+        if write_transaction(connection, number, index, rows):
+            own.append(time.perf_counter() - began)
+        else:
+            locked += 1
+    connection.close()
+    with run.lock:
+        run.latencies.extend(own)
+        run.locked += locked
+
+
+def bench_reader(run):
+    connection = run.connect()
+    reads = 0
+    run.start.wait()
+    while not run.done.is_set():
+        try:
+            connection.execute(
+                f'SELECT * FROM {BENCH_TABLE} WHERE post_id = ? '
+                'ORDER BY created_at DESC LIMIT 20', (reads % 100,)
+            ).fetchall()
+        except sqlite3.OperationalError as error:
+            if 'locked' not in str(error):
+                raise
+            continue
+        reads += 1
+    connection.close()
+    with run.lock:
+        run.reads += reads
+
+
+def latency_ms(latencies, percent):
+    if not latencies:
+        return None
+    return round(percentile(latencies, percent) * 1e3, 2)
+
+
+def run_write_benchmark(path, pragmas, writers=8, transactions=200,
+                        rows=1, readers=2):
+    """Пропускная способность мелких записей в файл SQLite path.
+
+    Как при наплыве комментариев: writers потоков со своими соединениями
+    делают по transactions транзакций BEGIN … COMMIT из rows вставок,
+    а readers потоков всё это время читают свежие строки, как лента.
+    Возвращает коммиты в секунду, задержки коммита и число ошибок
+    database is locked.
+    """
+    create_bench_table(path, pragmas)
+    run = WriteRun(path, pragmas, writers + readers + 1)
+    write_threads = [
+        threading.Thread(
+            target=bench_writer, args=(run, number, transactions, rows)
+        )
+        for number in range(writers)
+    ]
+    read_threads = [
+        threading.Thread(target=bench_reader, args=(run,))
+        for _ in range(readers)
+    ]
+    for thread in write_threads + read_threads:
+        thread.start()
+    run.start.wait()
+    began = time.perf_counter()
+    for thread in write_threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    run.done.set()
+    for thread in read_threads:
+        thread.join()
+    return {
+        'commits': len(run.latencies),
+        'seconds': round(elapsed, 3),
+        'commits_per_s': round(len(run.latencies) / elapsed, 1),
+        'p50_ms': latency_ms(run.latencies, 50),
+        'p95_ms': latency_ms(run.latencies, 95),
+        'locked': run.locked,
+        'reads_per_s': round(run.reads / elapsed, 1),
+    }
@@ -0,0 +1,294 @@
+import gzip
+import json
+import re
+from collections import Counter, defaultdict
+
+from django.core import serializers
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from blog.cache import FEED_TAG, GLOBAL_TAG, REFDATA_TAG, invalidate_tags
+from blog.feed import rebuild_feed
+from blog.lookups import refdata
+from blog.models import FeedEntry, Post, SearchPosting, make_excerpt
+from blog.search import rebuild_index
+from blog.service import recount_comments
+
+BATCH_SIZE = 2000
+CHUNK_SIZE = 1 << 16
+
+WHITESPACE = re.compile(r'\s*')
+# Хвост буфера без пробелов и разделителей: оборванная лексема.
+CUT_TOKEN = re.compile(r'[^\s,:\[\]{}]*\Z')
+
+# Таблицы, которые целиком выводятся из остальных и пересобираются
+# после загрузки: строки из фикстуры для них пропускаются.
+DERIVED_MODELS = (FeedEntry, SearchPosting)
+
+
+def open_fixture(path):
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+class ChunkReader:
+    """Поток, читаемый кусками, с позицией разбора в текущем буфере."""
+
+    def __init__(self, stream, chunk_size):
+        self.stream, self.chunk_size = stream, chunk_size
+        self.buffer, self.position, self.eof = '', 0, False
+        # Сколько символов потока уже отброшено из начала буфера.
+        self.consumed = 0
+
+    def read_more(self):
+        if self.eof:
+            raise ValueError('Фикстура оборвана: нет закрывающей скобки.')
+        chunk = self.stream.read(self.chunk_size)
+        self.eof = not chunk
+        self.consumed += self.position
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def peek(self):
+        """Следующий непробельный символ; позиция встаёт на него."""
+        while True:
+            self.position = WHITESPACE.match(
+                self.buffer, self.position
+            ).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            self.read_more()
+
+    def expect(self, char, message):
+        if self.peek() != char:
+            raise ValueError(message)
+        self.position += 1
+
+    def decode(self, decoder):
+        """Очередной JSON-элемент, при необходимости с подчитыванием."""
+        self.peek()
+        while True:
+            try:
+                item, self.position = decoder.raw_decode(
+                    self.buffer, self.position
+                )
+                return item
+            except json.JSONDecodeError as error:
+                if self.eof or not is_cut_off(error):
+                    raise ValueError(
+                        'Некорректный JSON в фикстуре на позиции '
+                        f'{self.consumed + error.pos}: {error.msg}.'
+                    ) from error
+            self.read_more()
+
+
+def is_cut_off(error):
+    """Ошибка разбора вызвана элементом, оборванным на конце буфера.
+
+    Это либо незакрытая строка, либо ошибка в последней лексеме буфера,
+    после которой нет ни пробелов, ни разделителей. Ошибка раньше конца
+    буфера от подчитывания не исчезнет.
+    """
+    return (
+        error.msg.startswith('Unterminated string')
+        or CUT_TOKEN.match(error.doc, error.pos) is not None
+    )
+
+
+def iter_json_array(stream, chunk_size=CHUNK_SIZE):
+    """Элементы JSON-массива из потока по одному, без чтения файла целиком.
+
+    Читает поток кусками и разбирает каждый элемент через raw_decode;
+    элемент, оборванный на границе куска, разбирается заново после
+    подчитывания следующего. Ошибка синтаксиса поднимается сразу,
+    с позицией в потоке.
+    """
+    decoder = json.JSONDecoder()
+    reader = ChunkReader(stream, chunk_size)
+    reader.expect('[', 'Фикстура должна быть JSON-массивом.')
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.decode(decoder)
+        char = reader.peek()
+        if char == ']':
+            return
+        reader.expect(',', f'Ожидалась запятая, а не {char!r}.')
+
+
+def dependencies(model):
+    """Модели, на которые ссылаются внешние ключи model."""
+    return {
+        field.related_model._meta.concrete_model
+        for field in model._meta.local_concrete_fields
+        if field.is_relation and field.related_model is not None
+        and field.related_model._meta.concrete_model is not model
+    }
+
+
+def prepare(obj):
+    """Поля, которые обычно заполняет save(): при вставке он не вызывается."""
+    if isinstance(obj, Post) and not obj.excerpt:
+        obj.excerpt = make_excerpt(obj.text)
+    if hasattr(obj, 'updated_at') and obj.updated_at is None:
+        # Фикстура из версии без updated_at.
+        obj.updated_at = obj.created_at
+
+
+class BulkLoader:
+    """Пакетная вставка десериализованных объектов по моделям.
+
+    Объекты копятся по моделям; заполненный пакет вставляется одним
+    INSERT на пакет, а перед ним — накопленные пакеты моделей, на которые
+    он ссылается. Вставка идёт в режиме raw, как у loaddata: значения
+    auto_now_add из фикстуры сохраняются, сигналы не отправляются.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, batch_size=BATCH_SIZE,
+                 exclude=()):
+        self.using = using
+        self.batch_size = batch_size
+        self.exclude = set(exclude)
+        self.pending = defaultdict(list)
+        self.loaded = Counter()
+        self.models = set()
+        self.had_rows = {}
+
+    def is_excluded(self, model):
+        meta = model._meta
+        return (
+            model in DERIVED_MODELS
+            or meta.app_label in self.exclude
+            or meta.label in self.exclude
+        )
+
+    def add(self, deserialized):
+        model = deserialized.object._meta.concrete_model
+        if self.is_excluded(model):
+            return
+        self.pending[model].append(deserialized)
+        if len(self.pending[model]) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model, flushing=frozenset()):
+        flushing = flushing | {model}
+        for parent in dependencies(model) - flushing:
+            if self.pending[parent]:
+                self.flush(parent, flushing)
+        batch, self.pending[model] = self.pending[model], []
+        if batch:
+            self.insert(model, batch)
+
+    def flush_all(self):
+        for model in list(self.pending):
+            self.flush(model)
+
+    def existing_pks(self, model, objs):
+        # Строки, уже созданные миграциями (например, права доступа),
+        # обновляются, как это делает loaddata.
+        if model not in self.had_rows:
+            self.had_rows[model] = model._base_manager.using(
+                self.using
+            ).exists()
+        if not self.had_rows[model]:
+            return set()
+        return set(model._base_manager.using(self.using).filter(
+            pk__in=[obj.pk for obj in objs]
+        ).values_list('pk', flat=True))
+
+    def insert(self, model, batch):
+        objs = [deserialized.object for deserialized in batch]
+        for obj in objs:
+            prepare(obj)
+        fields = model._meta.local_concrete_fields
+        manager = model._base_manager.using(self.using)
+        existing = self.existing_pks(model, objs)
+        new = []
+        for obj in objs:
+            if obj.pk is None:
+                # Без pk строку не связать с M2M и детьми — сохраняем
+                # по одной, как loaddata.
+                obj.save_base(raw=True, using=self.using)
+            elif obj.pk not in existing:
+                new.append(obj)
+        if existing:
+            manager.bulk_update(
+                [obj for obj in objs if obj.pk in existing],
+                [field.name for field in fields if not field.primary_key],
+            )
+        if new:
+            ops = connections[self.using].ops
+            size = ops.bulk_batch_size(fields, new) or len(new)
+            for start in range(0, len(new), size):
+                manager._insert(
+                    new[start:start + size], fields=fields, raw=True,
+                    using=self.using,
+                )
+        self.insert_m2m(model, batch)
+        self.models.add(model)
+        self.loaded[model._meta.label] += len(objs)
+
+    def insert_m2m(self, model, batch):
+        rows = defaultdict(list)
+        for deserialized in batch:
+            for name, values in (deserialized.m2m_data or {}).items():
+                field = model._meta.get_field(name)
+                through = field.remote_field.through
+                source = through._meta.get_field(
+                    field.m2m_field_name()
+                ).attname
+                target = through._meta.get_field(
+                    field.m2m_reverse_field_name()
+                ).attname
+                rows[through].extend(
+                    through(**{source: deserialized.object.pk, target: value})
+                    for value in values
+                )
+        for through, objs in rows.items():
+            through._base_manager.using(self.using).bulk_create(
+                objs, batch_size=self.batch_size, ignore_conflicts=True
+            )
+
+
+def rebuild_derived(using=DEFAULT_DB_ALIAS):
+    """Счётчики, лента, поиск и кеши после загрузки в обход сигналов."""
+    recount_comments(using)
+    rebuild_feed(using)
+    rebuild_index(using)
+    invalidate_tags(GLOBAL_TAG, FEED_TAG, REFDATA_TAG)
+    refdata.clear()
+
+
+def load_fixture(path, using=DEFAULT_DB_ALIAS, batch_size=BATCH_SIZE,
+                 exclude=(), chunk_size=CHUNK_SIZE, ignorenonexistent=False):
+    """Потоковая загрузка фикстуры формата dumpdata (JSON, можно .gz).
+
+    В отличие от loaddata файл не читается в память целиком, а строки
+    вставляются пакетами. Производные данные пересобираются один раз
+    в конце. ignorenonexistent — как у loaddata: пропускать поля
+    и модели, которых нет в схеме. Возвращает Counter загруженных
+    объектов по моделям.
+    """
+    connection = connections[using]
+    loader = BulkLoader(using, batch_size, exclude)
+    with open_fixture(path) as stream, transaction.atomic(using=using):
+        with connection.constraint_checks_disabled():
+            for deserialized in serializers.deserialize(
+                'python', iter_json_array(stream, chunk_size),
+                using=using, ignorenonexistent=ignorenonexistent,
+            ):
+                loader.add(deserialized)
+            loader.flush_all()
+        connection.check_constraints(
+            table_names=[model._meta.db_table for model in loader.models]
+        )
+        sequence_sql = connection.ops.sequence_reset_sql(
+            no_style(), list(loader.models)
+        )
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for line in sequence_sql:
+                    cursor.execute(line)
+        rebuild_derived(using)
+    return loader.loaded
@@ -0,0 +1,409 @@
+import asyncio
+import calendar
+import hashlib
+import time
+from functools import partial, wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.html import format_html_join
+from django.utils.http import http_date
+from django.utils.safestring import mark_safe
+
+from blog.executor import run_sync
+from blog.models import Category, FeedEntry, Location, Post
+from blog.routers import reading_from_replica
+
+TAG_KEY = 'blog:tag:{}'
+TAG_TIME_KEY = 'blog:tag-time:{}'
+PAGE_KEY = 'blog:page:{}'
+CARD_KEY = 'blog:card:{}:{}'
+OBJECT_KEY = 'blog:object:{}'
+
+GLOBAL_TAG = 'global'
+FEED_TAG = 'feed'
+REFDATA_TAG = 'refdata'
+
+
+def category_tag(slug):
+    return f'category:{slug}'
+
+
+def author_tag(username):
+    return f'author:{username}'
+
+
+def post_tag(pk):
+    return f'post:{pk}'
+
+
+def new_version():
+    # Версия от времени, а не с единицы: вытесненный из кеша тег
+    # не вернётся к уже использованному номеру.
+    return time.time_ns()
+
+
+def cache_is_shared():
+    """Кеш виден всем процессам; LocMemCache — только своему.
+
+    На кеше одного процесса сброс тегов из другого процесса (планировщика,
+    загрузчика, соседнего воркера) не виден, поэтому страницы и объекты
+    в нём не хранятся.
+    """
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def get_tag_versions(tags):
+    """Текущие версии тегов одним обращением к кешу."""
+    keys = {tag: TAG_KEY.format(tag) for tag in tags}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for tag, key in keys.items():
+        if key not in found:
+            cache.add(key, new_version(), None)
+            found[key] = cache.get(key)
+        versions[tag] = found[key]
+    return versions
+
+
+def bump_tags(tags):
+    # Всегда новая версия от времени: incr дал бы номер, который мог
+    # уже достаться этому тегу до вытеснения, и старые страницы ожили бы.
+    cache.set_many(
+        {TAG_KEY.format(tag): new_version() for tag in tags}, None
+    )
+    now = int(time.time())
+    cache.set_many({TAG_TIME_KEY.format(tag): now for tag in tags}, None)
+
+
+def get_tag_changed_at(tags):
+    """Время последнего сброса любого из тегов, в секундах.
+
+    Время, которого нет в кеше, считается текущим и запоминается — так
+    же, как потерянная версия тега заменяется новой.
+    """
+    keys = [TAG_TIME_KEY.format(tag) for tag in tags]
+    found = cache.get_many(keys)
+    now = int(time.time())
+    for key in keys:
+        if key not in found:
+            cache.add(key, now, None)
+            found[key] = cache.get(key, now)
+    return max(found.values())
+
+
+def invalidate_tags(*tags):
+    """Сброс всего, что закешировано под этими тегами.
+
+    Версии меняются после коммита текущей транзакции: сброшенные раньше,
+    они позволили бы параллельному читателю закешировать ещё старые
+    данные под новой версией. Вне транзакции — сразу.
+    """
+    transaction.on_commit(partial(bump_tags, tags))
+
+
+def page_cache_key(request, tags):
+    versions = get_tag_versions(tags)
+    raw = request.get_full_path() + ''.join(
+        f'|{tag}={versions[tag]}' for tag in sorted(versions)
+    )
+    return PAGE_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+
+def fill_timeout(timeout):
+    """Срок записи в кеш; данные с реплики могут отставать от default.
+
+    Тег мог быть сброшен уже после того, как реплика отдала старую
+    версию, поэтому такие записи живут не дольше
+    BLOG_REPLICA_CACHE_TIMEOUT.
+    """
+    if reading_from_replica():
+        return min(timeout, settings.BLOG_REPLICA_CACHE_TIMEOUT)
+    return timeout
+
+
+def get_tagged(name, tags, loader):
+    """Объект из кеша под версиями тегов; при промахе вызывает loader.
+
+    None от loader не кешируется. На кеше одного процесса — всегда loader.
+    """
+    if not cache_is_shared():
+        return loader()
+    versions = get_tag_versions(tags)
+    key = OBJECT_KEY.format(name) + ''.join(
+        f'|{tag}={versions[tag]}' for tag in sorted(versions)
+    )
+    value = cache.get(key)
+    if value is None:
+        value = loader()
+        if value is not None:
+            cache.set(
+                key, value, fill_timeout(settings.BLOG_OBJECT_CACHE_TIMEOUT)
+            )
+    return value
+
+
+def anonymous_page_key(request, get_tags, kwargs):
+    """Ключ кеша страницы или None, если запрос не кешируется."""
+    if (
+        not getattr(settings, 'BLOG_PAGE_CACHE', False)
+        or not cache_is_shared()
+        or request.method != 'GET'
+        or request.user.is_authenticated
+    ):
+        return None
+    return page_cache_key(request, [GLOBAL_TAG, *get_tags(request, **kwargs)])
+
+
+def cached_page(key):
+    cached = cache.get(key)
+    if cached is None:
+        return None
+    content, content_type = cached
+    return HttpResponse(content, content_type=content_type)
+
+
+def store_page(key, response):
+    if hasattr(response, 'render') and callable(response.render):
+        response = response.render()
+    if response.status_code == 200:
+        cache.set(
+            key,
+            (response.content, response['Content-Type']),
+            fill_timeout(settings.BLOG_PAGE_CACHE_TIMEOUT),
+        )
+    return response
+
+
+def cache_anonymous_page(get_tags):
+    """Кеш страницы целиком для анонимных посетителей.
+
+    get_tags(request, **kwargs) возвращает теги страницы; ключ кеша
+    включает их версии, поэтому сброс тега делает страницу невидимой.
+    Подходит и для асинхронных представлений: проверка пользователя
+    и обращения к кешу тогда идут через run_sync.
+    """
+    def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                key = await run_sync(
+                    anonymous_page_key, request, get_tags, kwargs
+                )
+                if key is None:
+                    return await view_func(request, *args, **kwargs)
+                response = await run_sync(cached_page, key)
+                if response is None:
+                    response = await view_func(request, *args, **kwargs)
+                    response = await run_sync(store_page, key, response)
+                return response
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            key = anonymous_page_key(request, get_tags, kwargs)
+            if key is None:
+                return view_func(request, *args, **kwargs)
+            response = cached_page(key)
+            if response is None:
+                response = store_page(
+                    key, view_func(request, *args, **kwargs)
+                )
+            return response
+        return wrapper
+    return decorator
+
+
+def db_changes(tags=()):
+    """Время последней правки и отпечаток данных под тегами из БД.
+
+    Запасной источник валидаторов, когда версии тегов не общие. Посты
+    дают MAX(updated_at) по индексу; живые записи ленты — число и
+    последнюю дату по частичному индексу: их меняют выпуск отложенных
+    постов, скрытие и удаление. Категории и места невелики и читаются
+    целиком. На странице автора к отпечатку добавляются его имена.
+    """
+    posts = Post.objects.aggregate(changed_at=Max('updated_at'))
+    live = FeedEntry.objects.filter(is_live=True).aggregate(
+        total=Count('pk'), latest=Max('pub_date')
+    )
+    refdata = [
+        model.objects.aggregate(
+            changed_at=Max('updated_at'), total=Count('pk')
+        )
+        for model in (Category, Location)
+    ]
+    changed = [
+        row['changed_at'] for row in (posts, *refdata) if row['changed_at']
+    ]
+    fingerprint = [live['total'], live['latest']]
+    fingerprint.extend(row['total'] for row in refdata)
+    prefix = author_tag('')
+    for tag in tags:
+        if tag.startswith(prefix):
+            fingerprint.append(get_user_model().objects.filter(
+                username=tag[len(prefix):]
+            ).values_list('pk', 'first_name', 'last_name').first())
+    return max(changed) if changed else None, tuple(fingerprint)
+
+
+def timestamp(changed_at):
+    if changed_at is None:
+        return 0
+    return calendar.timegm(changed_at.utctimetuple())
+
+
+def data_version(tags):
+    """Отпечаток данных под тегами и время их последней смены.
+
+    Версии тегов общие для всех процессов, если общий кеш. На кеше
+    одного процесса сброс из соседнего не виден, и версии заменяет
+    db_changes().
+    """
+    if not cache_is_shared():
+        changes = db_changes(tags)
+        return changes, timestamp(changes[0])
+    tags = [GLOBAL_TAG, *tags]
+    versions = sorted(get_tag_versions(tags).items())
+    return versions, get_tag_changed_at(tags)
+
+
+def page_validators(request, tags, changes=None):
+    """Валидаторы ETag и Last-Modified страницы по версиям её тегов.
+
+    ETag — отпечаток версий тегов, адреса и того, кто смотрит: вошедший
+    видит свои кнопки и черновики, а в формах — токен из cookie CSRF.
+    Last-Modified — время последнего сброса тегов; от зрителя оно
+    не зависит, поэтому у вошедших его нет (None). changes — пара
+    (время правки, отпечаток) из БД для того, что теги не покрывают.
+    """
+    versions, last_modified = data_version(tags)
+    parts = [
+        request.get_full_path(),
+        request.user.pk,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+        versions,
+    ]
+    if changes is not None:
+        parts.append(changes)
+        last_modified = max(last_modified, timestamp(changes[0]))
+    etag = hashlib.md5(repr(parts).encode()).hexdigest()
+    if request.user.is_authenticated:
+        # Иначе копия, полученная до входа или выхода, подтвердилась бы
+        # по одному If-Modified-Since.
+        last_modified = None
+    return f'"{etag}"', last_modified
+
+
+def request_validators(request, get_tags, get_changes, kwargs):
+    """Валидаторы страницы для GET и HEAD; None для остальных методов."""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    changes = get_changes and get_changes(request, **kwargs)
+    return page_validators(request, get_tags(request, **kwargs), changes)
+
+
+def not_modified(request, validators):
+    etag, last_modified = validators
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+
+
+def add_validators(request, response, validators):
+    etag, last_modified = validators
+    if response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+        if last_modified is not None:
+            response.headers.setdefault(
+                'Last-Modified', http_date(last_modified)
+            )
+        # Копию можно хранить, но перед показом — сверять с сервером.
+        patch_cache_control(
+            response, no_cache=True, private=request.user.is_authenticated
+        )
+    return response
+
+
+def conditional_page(get_tags, get_changes=None):
+    """Условный GET: 304 по ETag и Last-Modified без вызова представления.
+
+    Валидаторы считаются по тегам get_tags(request, **kwargs) — из кеша,
+    как и в cache_anonymous_page. get_changes(request, **kwargs) —
+    необязательная метка из БД для страниц, которые теги не покрывают;
+    None — метки нет.
+    """
+    def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                found = await run_sync(
+                    request_validators, request, get_tags, get_changes,
+                    kwargs,
+                )
+                if found is None:
+                    return await view_func(request, *args, **kwargs)
+                response = not_modified(request, found)
+                if response is None:
+                    response = await view_func(request, *args, **kwargs)
+                return await run_sync(
+                    add_validators, request, response, found
+                )
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            found = request_validators(request, get_tags, get_changes, kwargs)
+            if found is None:
+                return view_func(request, *args, **kwargs)
+            response = not_modified(request, found)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+            return add_validators(request, response, found)
+        return wrapper
+    return decorator
+
+
+def card_version(post):
+    """Отпечаток всех полей, которые выводит карточка поста."""
+    category, location = post.category, post.location
+    parts = (
+        post.title, post.excerpt, post.pub_date.isoformat(), post.is_published,
+        post.image.name, post.image_processing,
+        sorted(post.image_variants.items()),
+        post.comment_count, post.author.username,
+        category and (category.slug, category.title, category.is_published),
+        location and (location.name, location.is_published),
+    )
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def render_post_cards(posts):
+    """HTML карточек страницы: одно обращение get_many за всеми.
+
+    Ключ карточки строится из id поста и отпечатка её данных, поэтому
+    правка поста, категории или места просто даёт новый ключ.
+    """
+    posts = list(posts)
+    keys = [CARD_KEY.format(post.pk, card_version(post)) for post in posts]
+    cards = cache.get_many(keys)
+    missing = {}
+    for key, post in zip(keys, posts):
+        if key not in cards:
+            missing[key] = render_to_string(
+                'includes/post_card.html', {'post': post}
+            )
+    if missing:
+        cache.set_many(missing, settings.BLOG_CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return format_html_join(
+        '\n', '<article class="mb-5">{}</article>',
+        ((mark_safe(cards[key]),) for key in keys),
+    )
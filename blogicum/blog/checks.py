@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from blog.cache import cache_is_shared
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Кеш страниц на кеше одного процесса отдавал бы устаревшие страницы."""
+    if getattr(settings, 'BLOG_PAGE_CACHE', False) and not cache_is_shared():
+        return [Error(
+            'BLOG_PAGE_CACHE включён, а кеш default виден только одному '
+            'процессу: сброс из publish_scheduled и других воркеров '
+            'до него не дойдёт.',
+            hint='Задайте BLOGICUM_CACHE=file, db или redis://…',
+            id='blog.E001',
+        )]
+    return []
@@ -0,0 +1,69 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from blogicum.querycount import attach_current_log
+
+_executor = None
+_executor_size = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    """Общий пул потоков для ORM асинхронных представлений.
+
+    Размер задаёт BLOG_DB_THREADS: он же ограничивает число одновременных
+    соединений с БД от одного ASGI-процесса.
+    """
+    global _executor, _executor_size
+    size = settings.BLOG_DB_THREADS
+    with _lock:
+        if _executor_size != size:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(
+                max_workers=size, thread_name_prefix='blog-db'
+            )
+            _executor_size = size
+        return _executor
+
+
+def logged_call(func, args, kwargs):
+    # Запросы из другого потока попадают в учёт текущего запроса.
+    with attach_current_log():
+        return func(*args, **kwargs)
+
+
+def call(func, args, kwargs):
+    try:
+        return logged_call(func, args, kwargs)
+    finally:
+        # Поток пула переживает запрос: его соединение закрывается
+        # так же, как по сигналу request_finished.
+        close_old_connections()
+
+
+async def run_sync(func, *args, **kwargs):
+    """Синхронный код (ORM, шаблоны) из асинхронного представления.
+
+    Вызовы идут в выделенный пул и не занимают общий поток
+    thread_sensitive-исполнителя, поэтому их можно запускать параллельно
+    через asyncio.gather. При BLOG_DB_THREADS = 0 — обычный
+    sync_to_async(thread_sensitive=True): так работают тесты, где
+    тестовая БД видна только соединению основного потока.
+    """
+    if not settings.BLOG_DB_THREADS:
+        return await sync_to_async(logged_call, thread_sensitive=True)(
+            func, args, kwargs
+        )
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(),
+        functools.partial(context.run, call, func, args, kwargs),
+    )
@@ -0,0 +1,113 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from blog.models import FeedEntry, Post
+
+BATCH_SIZE = 1000
+
+# Лента изменилась: аргументы post_ids, category_ids, author_ids.
+feed_changed = Signal()
+
+
+def is_visible(post):
+    """Виден ли пост в ленте без учёта даты публикации."""
+    return bool(
+        post.is_published
+        and post.category_id is not None
+        and post.category.is_published
+    )
+
+
+def entry_for(post, now):
+    return FeedEntry(
+        post_id=post.pk,
+        pub_date=post.pub_date,
+        category_id=post.category_id,
+        author_id=post.author_id,
+        is_live=post.pub_date <= now,
+    )
+
+
+def send_feed_changed(entries):
+    feed_changed.send(
+        sender=FeedEntry,
+        post_ids={entry.post_id for entry in entries},
+        category_ids={entry.category_id for entry in entries},
+        author_ids={entry.author_id for entry in entries},
+    )
+
+
+def sync_post(post):
+    """Добавление, обновление или удаление записи ленты для поста."""
+    old = FeedEntry.objects.filter(post_id=post.pk).first()
+    entries = [old] if old else []
+    if is_visible(post):
+        entry = entry_for(post, timezone.now())
+        entry.save()
+        entries.append(entry)
+    elif old:
+        FeedEntry.objects.filter(post_id=post.pk).delete()
+    if entries:
+        send_feed_changed(entries)
+
+
+def add_posts(posts, using=DEFAULT_DB_ALIAS):
+    """Пакетная вставка записей ленты для постов с видимой категорией."""
+    entries = FeedEntry.objects.using(using)
+    now = timezone.now()
+    batch = []
+    for post in posts.only(
+        'pk', 'pub_date', 'category_id', 'author_id'
+    ).iterator():
+        batch.append(entry_for(post, now))
+        if len(batch) >= BATCH_SIZE:
+            entries.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    entries.bulk_create(batch, ignore_conflicts=True)
+
+
+def sync_category(category):
+    """Публикация или скрытие всех постов категории разом."""
+    if not category.is_published:
+        FeedEntry.objects.filter(category_id=category.pk).delete()
+        return
+    add_posts(Post.objects.filter(category=category, is_published=True))
+
+
+def rebuild_feed(using=DEFAULT_DB_ALIAS):
+    """Полная пересборка ленты в базе using; возвращает число записей."""
+    with transaction.atomic(using=using):
+        FeedEntry.objects.using(using).all().delete()
+        add_posts(Post.objects.using(using).filter(
+            is_published=True,
+            category__is_published=True,
+        ), using)
+        return FeedEntry.objects.using(using).count()
+
+
+def publish_due(now=None):
+    """Выпуск в ленту отложенных постов, чья дата публикации наступила.
+
+    Рассылает те же события feed_changed, что и правка поста.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        due = FeedEntry.objects.filter(is_live=False, pub_date__lte=now)
+        entries = list(due.only('post_id', 'category_id', 'author_id'))
+        # Выпуск меняет страницу поста, как и правка: валидаторы без
+        # общего кеша увидят его по updated_at.
+        Post.objects.filter(pk__in=due.values('post_id')).update(
+            updated_at=timezone.now()
+        )
+        due.update(is_live=True)
+    if entries:
+        send_feed_changed(entries)
+    return len(entries)
+
+
+def next_publication():
+    """Дата ближайшей отложенной публикации или None."""
+    return FeedEntry.objects.filter(is_live=False).order_by(
+        'pub_date'
+    ).values_list('pub_date', flat=True).first()
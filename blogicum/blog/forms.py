@@ -1,6 +1,11 @@
+from functools import partial
+
 from django import forms
 from django.contrib.auth import get_user_model
+from django.db import transaction
 
+from blog.imagejobs import enqueue
+from blog.images import delete_variants
 from blog.models import Comment, Post
 
 User = get_user_model()
@@ -26,6 +31,34 @@ class PostForm(forms.ModelForm):
         )}
         format = '%Y-%m-%dT%H:%M'
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Копии до правки: save() может повториться после отката
+        # (очередь записи), когда instance уже изменён.
+        self.old_variants = self.instance.image_variants
+
+    def save(self, commit=True):
+        """Сохранение поста; новое фото уходит в очередь обработки.
+
+        Копии фото строит process_images вне запроса, а до тех пор
+        пост показывает заглушку. Старые копии удаляются только после
+        коммита: откаченная запись их не теряет.
+        """
+        image_changed = 'image' in self.changed_data
+        if image_changed:
+            self.instance.image_variants = {}
+            self.instance.image_processing = bool(
+                self.cleaned_data.get('image')
+            )
+        post = super().save(commit)
+        if image_changed and commit:
+            transaction.on_commit(
+                partial(delete_variants, self.old_variants)
+            )
+            if post.image_processing:
+                enqueue(post)
+        return post
+
 
 class ProfileForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,138 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from blog.images import delete_variants, make_variants
+from blog.models import ImageJob, Post
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(post):
+    """Постановка свежего фото поста в очередь обработки.
+
+    Пост должен быть уже сохранён с image_processing=True.
+    """
+    return ImageJob.objects.create(post=post, image=post.image.name)
+
+
+def enqueue_missing():
+    """Задания для фото, у которых нет ни копий, ни задания в очереди."""
+    posts = Post.objects.exclude(image='').filter(
+        image_variants={}
+    ).exclude(
+        image_jobs__status__in=(ImageJob.PENDING, ImageJob.RUNNING)
+    ).only('pk', 'image')
+    jobs = [ImageJob(post=post, image=post.image.name) for post in posts]
+    ImageJob.objects.bulk_create(jobs)
+    Post.objects.filter(
+        pk__in=[job.post_id for job in jobs]
+    ).update(image_processing=True)
+    return len(jobs)
+
+
+def claim(limit):
+    """Взятие в работу до limit заданий; возвращает взятые.
+
+    Задание берётся условным UPDATE по его прежнему состоянию, поэтому
+    два обработчика не получат одно задание. Зависшие дольше
+    BLOG_IMAGE_JOB_LEASE секунд задания выдаются повторно.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.BLOG_IMAGE_JOB_LEASE)
+    available = Q(status=ImageJob.PENDING) | Q(
+        status=ImageJob.RUNNING, locked_at__lt=stale
+    )
+    claimed = []
+    for job in ImageJob.objects.filter(available).order_by(
+        'created_at', 'pk'
+    )[:limit]:
+        taken = ImageJob.objects.filter(
+            available, pk=job.pk, attempts=job.attempts
+        ).update(
+            status=ImageJob.RUNNING, locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if taken:
+            job.attempts += 1
+            claimed.append(job)
+    return claimed
+
+
+def process_image(name):
+    """Декодирование фото и сборка копий; выполняется в дочернем процессе."""
+    with default_storage.open(name) as file:
+        return make_variants(file, name)
+
+
+@transaction.atomic
+def finish(job, variants):
+    """Запись готовых копий в пост, если фото за это время не сменили."""
+    post = Post.objects.select_for_update().filter(pk=job.post_id).first()
+    if post is None or post.image.name != job.image:
+        delete_variants(variants)
+    else:
+        old_variants = post.image_variants
+        post.image_variants = variants
+        post.image_processing = False
+        # save(), а не update(): сигналы сбрасывают кеши страниц.
+        post.save(update_fields=('image_variants', 'image_processing'))
+        delete_variants(old_variants)
+    ImageJob.objects.filter(pk=job.pk).update(
+        status=ImageJob.DONE, error=''
+    )
+
+
+def fail(job, error):
+    """Возврат задания в очередь; после последней попытки — отказ.
+
+    Пост без копий показывает исходное фото вместо заглушки.
+    """
+    if job.attempts < settings.BLOG_IMAGE_JOB_ATTEMPTS:
+        ImageJob.objects.filter(pk=job.pk).update(
+            status=ImageJob.PENDING, error=repr(error)
+        )
+        return
+    logger.error('Не удалось обработать %s: %r', job.image, error)
+    with transaction.atomic():
+        ImageJob.objects.filter(pk=job.pk).update(
+            status=ImageJob.FAILED, error=repr(error)
+        )
+        post = Post.objects.filter(
+            pk=job.post_id, image=job.image
+        ).first()
+        if post is not None:
+            post.image_processing = False
+            post.save(update_fields=('image_processing',))
+
+
+def make_pool(workers=None):
+    # Дочерние процессы не работают с БД: соединения родителя закрываются,
+    # чтобы не достаться им при fork.
+    connections.close_all()
+    return ProcessPoolExecutor(
+        max_workers=workers or settings.BLOG_IMAGE_WORKERS,
+        initializer=django.setup,
+    )
+
+
+def run_jobs(pool, limit):
+    """Один проход очереди: до limit заданий в пул; возвращает их число."""
+    jobs = claim(limit)
+    futures = {pool.submit(process_image, job.image): job for job in jobs}
+    for future in as_completed(futures):
+        job = futures[future]
+        try:
+            variants = future.result()
+        except Exception as error:
+            fail(job, error)
+        else:
+            finish(job, variants)
+    return len(jobs)
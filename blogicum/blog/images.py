@@ -0,0 +1,120 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import ExifTags, Image, ImageOps
+
+from blogicum.constants import IMAGE_CARD_WIDTH, IMAGE_VARIANT_WIDTHS
+
+VARIANTS_DIR = 'media/variants/'
+
+# Ориентации EXIF с поворотом на 90°: ширина снимка — высота кадра.
+ROTATED = {5, 6, 7, 8}
+
+# Формат -> (расширение, параметры сохранения Pillow).
+FORMATS = {
+    'jpeg': ('jpg', {
+        'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True,
+    }),
+    'webp': ('webp', {'format': 'WEBP', 'quality': 80, 'method': 4}),
+}
+
+
+def flatten(image):
+    """RGB или L; прозрачное — на белом фоне, как у страницы."""
+    if image.mode in ('RGB', 'L'):
+        return image
+    if 'A' not in image.getbands() and 'transparency' not in image.info:
+        return image.convert('RGB')
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, 'white')
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def decode(file, largest):
+    """Открытие картинки с масштабированием ещё при декодировании.
+
+    draft() просит JPEG-декодер сразу уменьшить изображение в 2, 4 или
+    8 раз, но не меньше нужной ширины, — полный кадр с телефона
+    не распаковывается в память. Возвращает картинку и размеры снимка
+    с учётом поворота по EXIF.
+    """
+    image = Image.open(file)
+    width, height = image.size
+    rotated = image.getexif().get(ExifTags.Base.Orientation) in ROTATED
+    if rotated:
+        width, height = height, width
+    if width > largest:
+        size = (largest, round(height * largest / width))
+        # draft() считает в осях кадра, то есть до поворота.
+        image.draft('RGB', size[::-1] if rotated else size)
+    image = ImageOps.exif_transpose(image)
+    return flatten(image), (width, height)
+
+
+def scale(image, width):
+    """Уменьшение до ширины width: быстрый reduce(), затем LANCZOS."""
+    height = max(1, round(image.height * width / image.width))
+    factor = image.width // width
+    if factor >= 2:
+        image = image.reduce(factor)
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def make_variants(file, name, storage=default_storage,
+                  widths=IMAGE_VARIANT_WIDTHS):
+    """Уменьшенные копии картинки в JPEG и WebP.
+
+    Возвращает описание для Post.image_variants: размеры исходника и
+    {формат: {ширина: имя файла}}. Копии не шире исходника и не шире
+    декодированного кадра: картинка только уменьшается. Каждая
+    следующая копия строится из предыдущей, большей.
+    """
+    widths = sorted(widths, reverse=True)
+    file.seek(0)
+    image, (width, height) = decode(file, widths[0])
+    stem = os.path.splitext(os.path.basename(name))[0]
+    variants = {'width': width, 'height': height}
+    for kind in FORMATS:
+        variants[kind] = {}
+    source = image
+    for target in widths:
+        if target >= width or target > image.width:
+            continue
+        source = scale(source, target)
+        for kind, (extension, options) in FORMATS.items():
+            buffer = BytesIO()
+            source.save(buffer, **options)
+            variants[kind][str(target)] = storage.save(
+                f'{VARIANTS_DIR}{stem}_{target}.{extension}',
+                ContentFile(buffer.getvalue()),
+            )
+    return variants
+
+
+def delete_variants(variants, storage=default_storage):
+    for kind in FORMATS:
+        for name in variants.get(kind, {}).values():
+            storage.delete(name)
+
+
+def srcset(variants, kind, storage=default_storage):
+    """Значение атрибута srcset для формата kind или пустая строка."""
+    return ', '.join(
+        f'{storage.url(name)} {width}w'
+        for width, name in sorted(
+            variants.get(kind, {}).items(), key=lambda item: int(item[0])
+        )
+    )
+
+
+def variant_url(variants, width=IMAGE_CARD_WIDTH, storage=default_storage):
+    """URL наименьшего JPEG не уже width или None, если копий нет."""
+    jpeg = variants.get('jpeg', {})
+    if not jpeg:
+        return None
+    fitting = [int(key) for key in jpeg if int(key) >= width]
+    key = str(min(fitting) if fitting else max(map(int, jpeg)))
+    return storage.url(jpeg[key])
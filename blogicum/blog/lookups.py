@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from blog.cache import REFDATA_TAG, get_tag_versions
+from blog.models import Category, Location
+
+
+class RefDataCache:
+    """Процессный LRU для категорий и местоположений.
+
+    Таблицы маленькие и меняются редко, поэтому объекты держатся в памяти
+    воркера. Правка в админке увеличивает версию тега refdata в общем
+    кеше — каждый воркер сверяет её одним get и сбрасывает свой LRU.
+    Запись живёт не дольше BLOG_REFDATA_MAX_AGE секунд: так правка,
+    прошедшая мимо сигналов, или кеш одного процесса не оставляют
+    старые данные навсегда.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def check_version(self):
+        version = get_tag_versions([REFDATA_TAG])[REFDATA_TAG]
+        with self._lock:
+            if version != self._version:
+                self._items.clear()
+                self._version = version
+
+    def get_many(self, keys, loader):
+        """Значения по ключам; промахи загружаются одним вызовом loader."""
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                if key not in self._items:
+                    continue
+                value, expires = self._items[key]
+                if expires <= now:
+                    del self._items[key]
+                    continue
+                self._items.move_to_end(key)
+                found[key] = value
+        missing = [key for key in keys if key not in found]
+        if missing:
+            loaded = loader(missing)
+            found.update(loaded)
+            expires = now + settings.BLOG_REFDATA_MAX_AGE
+            with self._lock:
+                self._items.update(
+                    (key, (value, expires)) for key, value in loaded.items()
+                )
+                while len(self._items) > self.maxsize:
+                    self._items.popitem(last=False)
+        return found
+
+
+refdata = RefDataCache(settings.BLOG_REFDATA_CACHE_SIZE)
+
+
+def load_categories(keys):
+    return {
+        ('category', category.pk): category
+        for category in Category.objects.filter(
+            pk__in=[pk for _, pk in keys]
+        )
+    }
+
+
+def load_locations(keys):
+    return {
+        ('location', location.pk): location
+        for location in Location.objects.filter(
+            pk__in=[pk for _, pk in keys]
+        )
+    }
+
+
+def get_category_by_slug(slug):
+    """Категория по slug или None."""
+    refdata.check_version()
+    key = ('category_slug', slug)
+    found = refdata.get_many([key], lambda keys: {
+        key: Category.objects.filter(slug=slug).first()
+    })
+    return found[key]
+
+
+def attach_refdata(posts):
+    """Подстановка категорий и мест постам без JOIN в запросе ленты."""
+    posts = list(posts)
+    refdata.check_version()
+    categories = refdata.get_many(
+        list({('category', post.category_id) for post in posts
+              if post.category_id is not None}),
+        load_categories,
+    )
+    locations = refdata.get_many(
+        list({('location', post.location_id) for post in posts
+              if post.location_id is not None}),
+        load_locations,
+    )
+    for post in posts:
+        category = categories.get(('category', post.category_id))
+        if category is not None:
+            post.category = category
+        location = locations.get(('location', post.location_id))
+        if location is not None:
+            post.location = location
+    return posts
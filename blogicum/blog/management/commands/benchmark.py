@@ -0,0 +1,168 @@
+import json
+import platform
+import subprocess
+import tempfile
+import uuid
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings, setup_test_environment, teardown_test_environment
+)
+from django.utils import timezone
+
+from blog.benchmark import compare, run_benchmark
+from blog.models import Post
+from blog.seeding import seed
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def private_caches(location):
+    """Кеши прогона: тот же бэкенд, что в настройках, но свои ключи.
+
+    Общий кеш сайта прогон не читает и не чистит; файловому кешу
+    достаётся свой каталог location, который удаляется после прогона.
+    """
+    default = {
+        **settings.CACHES['default'],
+        'KEY_PREFIX': f'benchmark-{uuid.uuid4().hex}',
+    }
+    if default['BACKEND'].endswith('.FileBasedCache'):
+        default['LOCATION'] = location
+    return {'default': default}
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер задержек всех страниц блога на синтетическом наборе данных '
+        'в отдельной тестовой базе: p50/p95/p99, запросы к БД и размер '
+        'ответа по каждому маршруту. Для замеров боевой конфигурации '
+        'запускайте с BLOGICUM_PRODUCTION=1.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--comments', type=int, default=1_000_000)
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Замеряемых запросов на маршрут и режим.',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=20,
+            help='Прогревочных запросов перед замером.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output', help='Файл для результатов в JSON.',
+        )
+        parser.add_argument(
+            '--compare', metavar='BASELINE',
+            help='JSON прошлого прогона для сравнения.',
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять тестовую базу и не заполнять её повторно '
+                 '(нужно TEST NAME у базы SQLite).',
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as source:
+                    baseline = json.load(source)['results']
+            except (OSError, ValueError, KeyError) as error:
+                raise CommandError(
+                    f'Не удалось прочитать {options["compare"]}: {error}'
+                )
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with override_settings(CACHES=private_caches(cache_dir)):
+                results = self.measure(options)
+
+        self.report(results)
+        if baseline is not None:
+            self.report_comparison(compare(baseline, results))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as target:
+                json.dump({
+                    'meta': {
+                        'revision': git_revision(),
+                        'created': timezone.now().isoformat(),
+                        'python': platform.python_version(),
+                        'django': django.get_version(),
+                        'production': settings.PRODUCTION,
+                        'dataset': {
+                            key: options[key]
+                            for key in ('users', 'posts', 'comments', 'seed')
+                        },
+                    },
+                    'results': results,
+                }, target, ensure_ascii=False, indent=2)
+
+    def measure(self, options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb'],
+            serialize=False,
+        )
+        try:
+            if not Post.objects.exists():
+                self.stdout.write('Заполнение тестовой базы…')
+                seed(
+                    users=options['users'],
+                    posts=options['posts'],
+                    comments=options['comments'],
+                    random_seed=options['seed'],
+                )
+            # Собственный учёт запросов middleware искажал бы время.
+            with override_settings(QUERY_INSTRUMENTATION=False):
+                return run_benchmark(
+                    requests=options['requests'],
+                    warmup=options['warmup'],
+                    random_seed=options['seed'],
+                )
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb']
+            )
+            teardown_test_environment()
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"маршрут":<36}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"SQL":>7}{"байт":>9}'
+        )
+        for key, row in results.items():
+            if 'skipped' in row:
+                self.stdout.write(f'{key:<36}пропущен: {row["skipped"]}')
+                continue
+            self.stdout.write(
+                f'{key:<36}{row["p50_ms"]:>9.2f}{row["p95_ms"]:>9.2f}'
+                f'{row["p99_ms"]:>9.2f}{row["queries_mean"]:>7.1f}'
+                f'{row["bytes_mean"]:>9}'
+            )
+
+    def report_comparison(self, rows):
+        self.stdout.write('\nИзменение относительно базового прогона:')
+        for row in rows:
+            deltas = ''.join(
+                f'{row[metric]:>+9.1%}' if row[metric] is not None
+                else f'{"—":>9}'
+                for metric in ('p50_ms', 'p95_ms', 'p99_ms')
+            )
+            self.stdout.write(
+                f'{row["route"]:<36}{deltas}{row["queries"]:>+7.1f}'
+                f'{row["bytes"]:>+9}'
+            )
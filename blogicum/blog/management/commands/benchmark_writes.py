@@ -0,0 +1,72 @@
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.benchmark import run_write_benchmark
+
+COLUMNS = (
+    'commits_per_s', 'p50_ms', 'p95_ms', 'locked', 'reads_per_s',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер пропускной способности мелких записей в SQLite, как при '
+        'наплыве комментариев: профиль default против production из '
+        'SQLITE_PROFILES. Пишет во временные файлы, рабочую базу '
+        'не трогает.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=2)
+        parser.add_argument(
+            '--transactions', type=int, default=200,
+            help='Транзакций на пишущий поток.',
+        )
+        parser.add_argument(
+            '--rows', type=int, default=1, help='Вставок на транзакцию.',
+        )
+        parser.add_argument(
+            '--dir',
+            help='Каталог для файлов базы: замер имеет смысл на том же '
+                 'диске, что и рабочая база (по умолчанию временный).',
+        )
+        parser.add_argument(
+            '--profiles', nargs='+', default=['default', 'production'],
+        )
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        results = {}
+        with tempfile.TemporaryDirectory(dir=options['dir']) as directory:
+            for profile in options['profiles']:
+                results[profile] = run_write_benchmark(
+                    os.path.join(directory, f'{profile}.sqlite3'),
+                    settings.SQLITE_PROFILES[profile],
+                    writers=options['writers'],
+                    transactions=options['transactions'],
+                    rows=options['rows'],
+                    readers=options['readers'],
+                )
+        self.stdout.write(
+            f'{"профиль":<12}' + ''.join(f'{name:>15}' for name in COLUMNS)
+        )
+        for profile, result in results.items():
+            self.stdout.write(f'{profile:<12}' + ''.join(
+                f'{str(result[name]):>15}' for name in COLUMNS
+            ))
+        base = next(iter(results.values()))
+        for profile, result in list(results.items())[1:]:
+            if base['commits_per_s']:
+                self.stdout.write(
+                    f'{profile}: в '
+                    f'{result["commits_per_s"] / base["commits_per_s"]:.1f}'
+                    f' раза больше коммитов в секунду'
+                )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
@@ -0,0 +1,54 @@
+import time
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.base import DeserializationError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+
+from blog.bulkload import BATCH_SIZE, load_fixture
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоковая загрузка фикстуры dumpdata (JSON или JSON.gz) пакетными '
+        'INSERT. Сигналы не отправляются: счётчики комментариев, лента и '
+        'кеши пересобираются один раз в конце. Рассчитана на пустую базу '
+        'после migrate.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixture', help='Путь к файлу фикстуры.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '-e', '--exclude', action='append', default=[],
+            help='Пропустить приложение или модель (app_label.ModelName).',
+        )
+        parser.add_argument(
+            '-i', '--ignorenonexistent', action='store_true',
+            help='Пропускать поля и модели, которых нет в схеме.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            loaded = load_fixture(
+                options['fixture'],
+                using=options['database'],
+                batch_size=options['batch_size'],
+                exclude=options['exclude'],
+                ignorenonexistent=options['ignorenonexistent'],
+            )
+        except (
+            OSError, ValueError, DeserializationError, DatabaseError,
+            FieldDoesNotExist,
+        ) as error:
+            raise CommandError(
+                f'Не удалось загрузить {options["fixture"]}: {error}'
+            )
+        for label, count in sorted(loaded.items()):
+            self.stdout.write(f'{label}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено объектов: {sum(loaded.values())} '
+            f'за {time.perf_counter() - started:.1f} с'
+        ))
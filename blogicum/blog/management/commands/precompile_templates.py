@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from blogicum.warmup import precompile_templates
+
+
+class Command(BaseCommand):
+    help = 'Компилирует шаблоны проекта и выводит время компиляции каждого.'
+
+    def handle(self, *args, **options):
+        timings = precompile_templates()
+        for name, elapsed in sorted(
+            timings, key=lambda item: item[1], reverse=True
+        ):
+            self.stdout.write(f'{elapsed * 1e3:8.2f} мс  {name}')
+        total = sum(elapsed for _, elapsed in timings)
+        self.stdout.write(self.style.SUCCESS(
+            f'Шаблонов: {len(timings)}, всего {total * 1e3:.2f} мс'
+        ))
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from blog.imagejobs import enqueue_missing, make_pool, run_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Обрабатывает очередь загруженных фото в пуле процессов: '
+        'декодирование, уменьшенные копии и размеры. Запускается по cron '
+        'или постоянно с флагом --loop.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int,
+            help='Число процессов (по умолчанию BLOG_IMAGE_WORKERS).',
+        )
+        parser.add_argument(
+            '--batch', type=int, default=20,
+            help='Сколько заданий брать за один проход.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, проверяя очередь каждые --interval с.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза при пустой очереди, в секундах.',
+        )
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Сначала поставить в очередь фото без копий, '
+                 'например загруженные до появления очереди.',
+        )
+
+    def handle(self, *args, **options):
+        if options['missing']:
+            self.stdout.write(f'Поставлено в очередь: {enqueue_missing()}')
+        with make_pool(options['workers']) as pool:
+            while True:
+                done = run_jobs(pool, options['batch'])
+                if done:
+                    self.stdout.write(f'Обработано фото: {done}')
+                elif not options['loop']:
+                    return
+                else:
+                    close_old_connections()
+                    time.sleep(options['interval'])
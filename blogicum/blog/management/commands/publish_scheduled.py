@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from blog.feed import next_publication, publish_due
+
+
+class Command(BaseCommand):
+    help = (
+        'Выпускает в ленту отложенные публикации, дата которых наступила. '
+        'Запускается по cron или постоянно с флагом --loop.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, просыпаясь к ближайшей публикации.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60,
+            help='Наибольшая пауза между проверками, в секундах.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            published = publish_due()
+            if published:
+                self.stdout.write(f'Опубликовано постов: {published}')
+            if not options['loop']:
+                return
+            close_old_connections()
+            time.sleep(self.pause(options['interval']))
+
+    def pause(self, interval):
+        upcoming = next_publication()
+        if upcoming is None:
+            return interval
+        wait = (upcoming - timezone.now()).total_seconds()
+        return min(interval, max(wait, 0))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog.feed import rebuild_feed
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает таблицу видимых постов FeedEntry, например после '
+        'loaddata или массовых правок через QuerySet.update().'
+    )
+
+    def handle(self, *args, **options):
+        total = rebuild_feed()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в ленте: {total}'
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from blog.search import rebuild_index, use_fts
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает поисковый индекс постов, например после loaddata '
+        'или смены BLOG_SEARCH_BACKEND.'
+    )
+
+    def handle(self, *args, **options):
+        total = rebuild_index()
+        backend = 'FTS5' if use_fts() else 'SearchPosting'
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {total} ({backend})'
+        ))
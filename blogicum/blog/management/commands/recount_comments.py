@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.service import recount_comments
+
+
+class Command(BaseCommand):
+    help = 'Сверяет Post.comment_count с реальным числом комментариев.'
+
+    def handle(self, *args, **options):
+        fixed = recount_comments()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков комментариев: {fixed}'
+        ))
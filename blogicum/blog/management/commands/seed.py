@@ -0,0 +1,90 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.seeding import BATCH_SIZE, seed
+
+COUNTS = {
+    'users': 1_000,
+    'categories': 20,
+    'locations': 50,
+    'posts': 10_000,
+    'comments': 100_000,
+}
+
+
+def fraction(value):
+    value = float(value)
+    if not 0 <= value <= 1:
+        raise ValueError(value)
+    return value
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, категориями, '
+        'местами, постами и комментариями пакетными bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in COUNTS.items():
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько создать (по умолчанию {default}).',
+            )
+        parser.add_argument(
+            '--scale', type=float, default=1,
+            help='Множитель всех количеств: --scale 100 даёт 10 млн '
+                 'комментариев при остальных значениях по умолчанию.',
+        )
+        parser.add_argument(
+            '--comment-skew', type=float, default=1.1,
+            help='Показатель закона Ципфа для комментариев на пост; '
+                 '0 — равномерно.',
+        )
+        parser.add_argument(
+            '--unpublished-categories', type=fraction, default=0.1,
+            help='Доля скрытых категорий.',
+        )
+        parser.add_argument(
+            '--future-posts', type=fraction, default=0.05,
+            help='Доля постов с датой публикации в будущем.',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['scale'] <= 0 or options['batch_size'] <= 0:
+            raise CommandError('--scale и --batch-size должны быть больше 0.')
+        counts = {
+            name: max(1, round(options[name] * options['scale']))
+            for name in COUNTS
+        }
+        self.reported = {}
+        started = time.perf_counter()
+        seed(
+            **counts,
+            comment_skew=options['comment_skew'],
+            unpublished_categories=options['unpublished_categories'],
+            future_posts=options['future_posts'],
+            random_seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=self.progress,
+        )
+        cache.clear()
+        elapsed = time.perf_counter() - started
+        rows = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано строк: {rows} за {elapsed:.1f} с '
+            f'({rows / elapsed:.0f} строк/с)'
+        ))
+
+    def progress(self, model, done, total):
+        # Не чаще одной строки на каждые 10% модели.
+        step = done * 10 // total
+        if step > self.reported.get(model, -1):
+            self.reported[model] = step
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {done}/{total}'
+            )
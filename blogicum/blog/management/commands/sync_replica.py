@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную SQLite-базу в реплики из BLOG_REPLICA_DATABASES '
+        'через backup API SQLite, которое даёт согласованный снимок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'aliases', nargs='*',
+            help='Какие реплики обновить (по умолчанию все).',
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.BLOG_REPLICA_DATABASES
+        if not aliases:
+            raise CommandError('Реплики не настроены: BLOGICUM_REPLICA_DBS.')
+        source = connections[DEFAULT_DB_ALIAS]
+        for alias in aliases:
+            if alias not in settings.BLOG_REPLICA_DATABASES:
+                raise CommandError(f'{alias} — не реплика.')
+            target = connections[alias]
+            if source.vendor != 'sqlite' or target.vendor != 'sqlite':
+                raise CommandError(
+                    'Копирование поддерживается только для SQLite; '
+                    'для других БД используйте их репликацию.'
+                )
+            source.ensure_connection()
+            target.ensure_connection()
+            source.connection.backup(target.connection)
+            self.stdout.write(self.style.SUCCESS(f'{alias} обновлена'))
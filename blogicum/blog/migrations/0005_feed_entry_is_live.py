@@ -0,0 +1,43 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:43
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_live(apps, schema_editor):
+    FeedEntry = apps.get_model('blog', 'FeedEntry')
+    FeedEntry.objects.filter(pub_date__lte=timezone.now()).update(
+        is_live=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_feed_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedentry',
+            name='is_live',
+            field=models.BooleanField(default=False, help_text='Включается планировщиком publish_scheduled, когда наступает дата публикации.', verbose_name='Показывается в ленте'),
+        ),
+        migrations.RunPython(mark_live, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(condition=models.Q(('is_live', True)), fields=['-pub_date', '-post'], name='feed_live_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(condition=models.Q(('is_live', True)), fields=['category', '-pub_date', '-post'], name='feed_live_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(condition=models.Q(('is_live', True)), fields=['author', '-pub_date', '-post'], name='feed_live_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(condition=models.Q(('is_live', False)), fields=['pub_date'], name='feed_scheduled_idx'),
+        ),
+    ]
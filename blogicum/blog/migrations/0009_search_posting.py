@@ -0,0 +1,114 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:11
+
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import OperationalError, migrations, models, transaction
+import django.db.models.deletion
+
+# Копия blog.search на момент миграции: миграция не должна меняться
+# вместе с живым модулем поиска.
+FTS_TABLE = 'blog_post_search'
+TERM_LENGTH = 64
+BATCH_SIZE = 1000
+WORD = re.compile(r'[^\W_]+')
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    return [word[:TERM_LENGTH] for word in WORD.findall(normalize(text))]
+
+
+def create_fts_table(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return False
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, text)'
+            )
+    except OperationalError as error:
+        if 'fts5' not in str(error):
+            raise
+        return False
+    return True
+
+
+def postings_for(post, SearchPosting):
+    title, text = Counter(tokenize(post.title)), Counter(tokenize(post.text))
+    return [
+        SearchPosting(
+            term=term, post_id=post.pk,
+            title_count=title[term], text_count=text[term],
+        )
+        for term in title.keys() | text.keys()
+    ]
+
+
+def iter_batches(posts):
+    batch = []
+    for post in posts.iterator(chunk_size=BATCH_SIZE):
+        batch.append(post)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def create_search_index(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    SearchPosting = apps.get_model('blog', 'SearchPosting')
+    fts = create_fts_table(schema_editor)
+    for posts in iter_batches(Post.objects.only('pk', 'title', 'text')):
+        if fts:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE} (rowid, title, text) '
+                    'VALUES (%s, %s, %s)',
+                    [(post.pk, normalize(post.title), normalize(post.text))
+                     for post in posts],
+                )
+        else:
+            SearchPosting.objects.bulk_create([
+                posting for post in posts
+                for posting in postings_for(post, SearchPosting)
+            ])
+
+
+def drop_fts_table(apps, schema_editor):
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_image_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Слово')),
+                ('title_count', models.PositiveIntegerField(default=0, verbose_name='В заголовке')),
+                ('text_count', models.PositiveIntegerField(default=0, verbose_name='В тексте')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_postings', to='blog.post', verbose_name='Публикация')),
+            ],
+            options={
+                'verbose_name': 'слово поиска',
+                'verbose_name_plural': 'Поисковый индекс',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchposting',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='search_term_post_unique'),
+        ),
+        migrations.RunPython(create_search_index, drop_fts_table),
+    ]
@@ -1,12 +1,22 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.urls import reverse
+from django.utils.text import Truncator
 
-from blogicum.constants import MAX_LENGTH, TEXT_LENGTH
+from blog import images
+from blogicum.constants import (
+    EXCERPT_WORDS, IMAGE_CARD_WIDTH, IMAGE_DETAIL_WIDTH, MAX_LENGTH,
+    SEARCH_TERM_LENGTH, TEXT_LENGTH
+)
 
 User = get_user_model()
 
 
+def make_excerpt(text):
+    """Анонс так же, как фильтр truncatewords в карточке поста."""
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
 class IsPubModel(models.Model):
     is_published = models.BooleanField(
         verbose_name='Опубликовано',
@@ -17,6 +27,10 @@ class IsPubModel(models.Model):
         verbose_name='Добавлено',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Изменено',
+        auto_now=True
+    )
 
     class Meta:
         abstract = True
@@ -69,6 +83,12 @@ class Post(IsPubModel):
     text = models.TextField(
         verbose_name='Текст'
     )
+    excerpt = models.TextField(
+        verbose_name='Анонс',
+        blank=True,
+        editable=False,
+        help_text='Начало текста для карточки в ленте; заполняется само.'
+    )
     pub_date = models.DateTimeField(
         verbose_name='Дата и время публикации',
         help_text=(
@@ -95,18 +115,88 @@ class Post(IsPubModel):
         verbose_name='Категория',
     )
     image = models.ImageField('Фото', upload_to='media/', blank=True)
+    image_variants = models.JSONField(
+        verbose_name='Уменьшенные копии фото',
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text='Размеры исходника и имена копий по форматам и ширине.',
+    )
+    image_processing = models.BooleanField(
+        verbose_name='Фото обрабатывается',
+        default=False,
+        editable=False,
+        help_text='Пока копии фото не готовы, вместо него показывается '
+                  'заглушка.',
+    )
+    comment_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         default_related_name = 'posts'
+        indexes = (
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx',
+            ),
+            # Список и date_hierarchy админки.
+            models.Index(
+                fields=('-pub_date', '-id'), name='post_pub_date_idx'
+            ),
+            # MAX(updated_at) для валидаторов страниц без общего кеша.
+            models.Index(fields=('updated_at',), name='post_updated_at_idx'),
+        )
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.excerpt = make_excerpt(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = {*update_fields, 'updated_at'}
+            if 'text' in update_fields:
+                update_fields.add('excerpt')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'pk': self.pk})
 
+    def image_url(self, width):
+        """Копия фото не уже width, а без копий — исходник."""
+        if not self.image:
+            return ''
+        return (
+            images.variant_url(self.image_variants, width)
+            or self.image.url
+        )
+
+    @property
+    def image_card_url(self):
+        return self.image_url(IMAGE_CARD_WIDTH)
+
+    @property
+    def image_detail_url(self):
+        return self.image_url(IMAGE_DETAIL_WIDTH)
+
+    @property
+    def image_srcset(self):
+        """Атрибут srcset из JPEG-копий и исходника; пусто, пока копий нет."""
+        srcset = images.srcset(self.image_variants, 'jpeg')
+        if not srcset:
+            return ''
+        return f'{srcset}, {self.image.url} {self.image_variants["width"]}w'
+
+    @property
+    def image_webp_srcset(self):
+        return images.srcset(self.image_variants, 'webp')
+
 
 class Comment(models.Model):
     text = models.TextField('Текст комментария')
@@ -125,9 +215,161 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_created_idx',
+            ),
+            models.Index(
+                fields=('-created_at', '-id'), name='comment_created_idx'
+            ),
+        )
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
         return (f'Комментарий от {self.author}: '
                 f'"{self.text}" к посту "{self.post.title}"')
+
+
+class FeedEntry(models.Model):
+    """Пост, опубликованный сам и в опубликованной категории.
+
+    До наступления pub_date запись хранится с is_live=False.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_entry',
+        verbose_name='Публикация',
+    )
+    pub_date = models.DateTimeField('Дата и время публикации')
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Категория',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Автор публикации',
+    )
+    is_live = models.BooleanField(
+        verbose_name='Показывается в ленте',
+        default=False,
+        help_text=(
+            'Включается планировщиком publish_scheduled, '
+            'когда наступает дата публикации.'
+        ),
+    )
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-post'),
+                condition=models.Q(is_live=True),
+                name='feed_live_pub_date_idx',
+            ),
+            models.Index(
+                fields=('category', '-pub_date', '-post'),
+                condition=models.Q(is_live=True),
+                name='feed_live_category_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-post'),
+                condition=models.Q(is_live=True),
+                name='feed_live_author_idx',
+            ),
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_live=False),
+                name='feed_scheduled_idx',
+            ),
+        )
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента'
+
+    def __str__(self):
+        return f'Запись ленты для поста {self.post_id}'
+
+
+class ImageJob(models.Model):
+    """Задание очереди на обработку загруженного фото поста."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Публикация',
+    )
+    image = models.CharField(
+        'Файл фото',
+        max_length=MAX_LENGTH,
+        help_text='Имя файла на момент постановки в очередь; если фото '
+                  'успели заменить, результат задания отбрасывается.',
+    )
+    status = models.CharField(
+        'Состояние', max_length=16, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    locked_at = models.DateTimeField('Взято в работу', null=True, blank=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('status', 'created_at'),
+                name='image_job_status_idx',
+            ),
+        )
+        verbose_name = 'обработка фото'
+        verbose_name_plural = 'Обработка фото'
+
+    def __str__(self):
+        return f'{self.image} ({self.get_status_display()})'
+
+
+class SearchPosting(models.Model):
+    """Вхождение слова в пост для поиска без FTS5.
+
+    Запасной обратный индекс: используется, когда SQLite собран без FTS5
+    или база другая. Заполняется сигналами сохранения поста.
+    """
+
+    term = models.CharField('Слово', max_length=SEARCH_TERM_LENGTH)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_postings',
+        verbose_name='Публикация',
+    )
+    title_count = models.PositiveIntegerField('В заголовке', default=0)
+    text_count = models.PositiveIntegerField('В тексте', default=0)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('term', 'post'), name='search_term_post_unique'
+            ),
+        )
+        verbose_name = 'слово поиска'
+        verbose_name_plural = 'Поисковый индекс'
+
+    def __str__(self):
+        return f'{self.term} → {self.post_id}'
@@ -0,0 +1,132 @@
+import asyncio
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.middleware import get_user
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.decorators import sync_and_async_middleware
+
+from blog.executor import run_sync
+
+PRIMARY_UNTIL = 'blog_primary_until'
+
+# Приложения, чьи таблицы читаются с реплик; сессии и прочее служебное
+# всегда читается с основной БД.
+REPLICATED_APPS = {'blog', 'auth'}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# Включается декоратором replica_reads на время представления.
+replica_reads_allowed = ContextVar('replica_reads_allowed', default=False)
+
+
+def reading_from_replica():
+    return replica_reads_allowed.get() and bool(
+        settings.BLOG_REPLICA_DATABASES
+    )
+
+
+class ReplicaRouter:
+    """Чтение ленты и публикаций с реплик, всё остальное — с основной БД.
+
+    С реплики читают только представления под replica_reads; записи и
+    чтения в других представлениях идут в default. Схема на реплики
+    не мигрируется: они получают её вместе с данными при копировании.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            model._meta.app_label in REPLICATED_APPS
+            and reading_from_replica()
+        ):
+            return random.choice(settings.BLOG_REPLICA_DATABASES)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной БД, связи между ними допустимы.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.BLOG_REPLICA_DATABASES
+
+
+def stick_to_primary(request):
+    """Чтения сессии с основной БД в ближайшие BLOG_PRIMARY_STICKY секунд."""
+    request.session[PRIMARY_UNTIL] = (
+        time.time() + settings.BLOG_PRIMARY_STICKY
+    )
+
+
+def prefers_primary(request):
+    """Сессия недавно писала в БД и должна видеть свои изменения.
+
+    Заодно загружает сессию и пользователя — до того, как чтения
+    переключатся на реплику.
+    """
+    get_user(request)
+    until = request.session.get(PRIMARY_UNTIL)
+    return until is not None and until > time.time()
+
+
+def replica_reads(view_func):
+    """Чтения представления с реплики, если сессия не привязана к default."""
+    if asyncio.iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if not settings.BLOG_REPLICA_DATABASES:
+                return await view_func(request, *args, **kwargs)
+            primary = await run_sync(prefers_primary, request)
+            token = replica_reads_allowed.set(not primary)
+            try:
+                return await view_func(request, *args, **kwargs)
+            finally:
+                replica_reads_allowed.reset(token)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not settings.BLOG_REPLICA_DATABASES:
+            return view_func(request, *args, **kwargs)
+        token = replica_reads_allowed.set(not prefers_primary(request))
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            replica_reads_allowed.reset(token)
+    return wrapper
+
+
+def stick_after_write(request, response):
+    if (
+        settings.BLOG_REPLICA_DATABASES
+        and request.method not in SAFE_METHODS
+        and response.status_code < 400
+        and request.user.is_authenticated
+    ):
+        stick_to_primary(request)
+    return response
+
+
+@sync_and_async_middleware
+def primary_after_write_middleware(get_response):
+    """Привязка сессии к основной БД после успешной записи.
+
+    Так автор сразу видит свой пост или комментарий, даже если реплика
+    ещё не догнала основную БД. Под ASGI цепочка не переходит в поток:
+    пользователь и сессия загружаются через run_sync.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            response = await get_response(request)
+            if request.method in SAFE_METHODS:
+                return response
+            return await run_sync(stick_after_write, request, response)
+    else:
+        def middleware(request):
+            return stick_after_write(request, get_response(request))
+    return middleware
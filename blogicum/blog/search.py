@@ -0,0 +1,284 @@
+import base64
+import binascii
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import (
+    DEFAULT_DB_ALIAS, OperationalError, connection, connections, transaction
+)
+from django.db.models import Count
+
+from blog.lookups import attach_refdata
+from blog.models import FeedEntry, Post, SearchPosting
+from blog.service import CursorPage, get_feed_posts
+from blogicum.constants import (
+    SEARCH_MAX_TERMS, SEARCH_TERM_LENGTH, SEARCH_TITLE_WEIGHT, TOTAL_POST
+)
+
+BATCH_SIZE = 1000
+
+# Виртуальная таблица FTS5: rowid — id поста. Создаётся миграцией,
+# если SQLite собран с FTS5. Текст в неё пишется уже через normalize(),
+# чтобы оба индекса одинаково сводили «ё» к «е».
+FTS_TABLE = 'blog_post_search'
+
+WORD = re.compile(r'[^\W_]+')
+
+# Насыщение частоты слова в BM25 запасного индекса.
+K1 = 1.2
+
+_fts_tables = {}
+
+
+def normalize(text):
+    """Нижний регистр без диакритики: «Ёлка» и «елка» — одно слово."""
+    text = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    return [
+        word[:SEARCH_TERM_LENGTH] for word in WORD.findall(normalize(text))
+    ]
+
+
+def query_terms(query):
+    """Различные слова запроса; ищутся посты, где есть все."""
+    return list(dict.fromkeys(tokenize(query)))[:SEARCH_MAX_TERMS]
+
+
+def create_fts_table(schema_editor):
+    """Создание таблицы FTS5; False, если SQLite собран без FTS5."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return False
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, text)'
+            )
+    except OperationalError as error:
+        if 'fts5' not in str(error):
+            raise
+        return False
+    return True
+
+
+def use_fts(using=DEFAULT_DB_ALIAS):
+    """Искать через FTS5, если таблица есть и не выбран запасной индекс."""
+    if settings.BLOG_SEARCH_BACKEND == 'python':
+        return False
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return False
+    name = db.settings_dict['NAME']
+    if name not in _fts_tables:
+        _fts_tables[name] = FTS_TABLE in db.introspection.table_names()
+    return _fts_tables[name]
+
+
+def fts_insert(cursor, posts):
+    cursor.executemany(
+        f'INSERT INTO {FTS_TABLE} (rowid, title, text) VALUES (%s, %s, %s)',
+        [(post.pk, normalize(post.title), normalize(post.text))
+         for post in posts],
+    )
+
+
+def index_post(post):
+    """Переиндексация заголовка и текста поста."""
+    if use_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk]
+            )
+            fts_insert(cursor, [post])
+        return
+    SearchPosting.objects.filter(post_id=post.pk).delete()
+    SearchPosting.objects.bulk_create(postings_for(post))
+
+
+def remove_post(post_id):
+    # Строки запасного индекса удаляются каскадом вместе с постом.
+    if use_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+
+def postings_for(post, model=SearchPosting):
+    title, text = Counter(tokenize(post.title)), Counter(tokenize(post.text))
+    return [
+        model(
+            term=term, post_id=post.pk,
+            title_count=title[term], text_count=text[term],
+        )
+        for term in title.keys() | text.keys()
+    ]
+
+
+def rebuild_index(using=DEFAULT_DB_ALIAS):
+    """Полная пересборка индекса, например после загрузки в обход сигналов.
+
+    Возвращает число проиндексированных постов.
+    """
+    fts = use_fts(using)
+    with transaction.atomic(using=using):
+        if fts:
+            with connections[using].cursor() as cursor:
+                cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        else:
+            SearchPosting.objects.using(using).all().delete()
+        total = 0
+        for posts in iter_batches(
+            Post.objects.using(using).only('pk', 'title', 'text')
+        ):
+            if fts:
+                with connections[using].cursor() as cursor:
+                    fts_insert(cursor, posts)
+            else:
+                SearchPosting.objects.using(using).bulk_create([
+                    posting
+                    for post in posts for posting in postings_for(post)
+                ])
+            total += len(posts)
+    return total
+
+
+def iter_batches(posts):
+    batch = []
+    for post in posts.iterator(chunk_size=BATCH_SIZE):
+        batch.append(post)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def fts_search(terms, after, limit, live_only=True):
+    """(ранг, id) найденных постов по FTS5, лучшие первыми.
+
+    bm25() в SQLite отрицателен: чем меньше, тем лучше совпадение.
+    Видимость с live_only берётся из ленты, как в get_published_posts.
+    """
+    match = ' '.join(f'"{term}"' for term in terms)
+    sql = (
+        'SELECT s.rank, s.rowid FROM ('
+        f'SELECT rowid, bm25({FTS_TABLE}, %s, 1.0) AS rank '
+        f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s) AS s'
+    )
+    if live_only:
+        sql += (
+            f' JOIN {FeedEntry._meta.db_table} AS f '
+            'ON f.post_id = s.rowid AND f.is_live'
+        )
+    params = [SEARCH_TITLE_WEIGHT, match]
+    if after is not None:
+        sql += ' WHERE s.rank > %s OR (s.rank = %s AND s.rowid > %s)'
+        params += [after[0], after[0], after[1]]
+    sql += ' ORDER BY s.rank, s.rowid LIMIT %s'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit])
+        return [tuple(row) for row in cursor.fetchall()]
+
+
+def python_search(terms, after, limit, live_only=True):
+    """То же по запасному индексу: BM25 без учёта длины поста."""
+    documents = Post.objects.count()
+    frequencies = dict(SearchPosting.objects.filter(
+        term__in=terms
+    ).values('term').annotate(total=Count('pk')).values_list(
+        'term', 'total'
+    ))
+    postings = SearchPosting.objects.filter(term__in=terms)
+    if live_only:
+        postings = postings.filter(post__feed_entry__is_live=True)
+    scores, matched = defaultdict(float), Counter()
+    for post_id, term, title_count, text_count in postings.values_list(
+        'post_id', 'term', 'title_count', 'text_count'
+    ):
+        frequency = frequencies[term]
+        idf = math.log(
+            1 + (documents - frequency + 0.5) / (frequency + 0.5)
+        )
+        count = SEARCH_TITLE_WEIGHT * title_count + text_count
+        scores[post_id] -= idf * count * (K1 + 1) / (count + K1)
+        matched[post_id] += 1
+    ranked = sorted(
+        (score, post_id) for post_id, score in scores.items()
+        if matched[post_id] == len(terms)
+    )
+    if after is not None:
+        ranked = [item for item in ranked if item > after]
+    return ranked[:limit]
+
+
+def find_post_ids(query, limit):
+    """Номера до limit лучших совпадений среди всех постов, для админки."""
+    terms = query_terms(query)
+    if not terms:
+        return []
+    search = fts_search if use_fts() else python_search
+    return [pk for _, pk in search(terms, None, limit, live_only=False)]
+
+
+def encode_rank_cursor(rank, pk):
+    raw = f'{rank!r}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_rank_cursor(cursor):
+    """Разбор курсора выдачи; для испорченного значения возвращает None."""
+    try:
+        raw = base64.urlsafe_b64decode(
+            cursor + '=' * (-len(cursor) % 4)
+        ).decode()
+        rank, pk = raw.rsplit('|', 1)
+        rank, pk = float(rank), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if not math.isfinite(rank):
+        return None
+    return rank, pk
+
+
+class SearchPage(CursorPage):
+    """Страница выдачи с курсором по ключу (ранг, id); только вперёд."""
+
+    def __init__(self, object_list, next_key, has_previous):
+        super().__init__(object_list, next_key is not None, has_previous)
+        self.next_key = next_key
+
+    @property
+    def next_cursor(self):
+        if self.next_key is None:
+            return None
+        return encode_rank_cursor(*self.next_key)
+
+    @property
+    def previous_cursor(self):
+        return None
+
+
+def search_posts(query, cursor=None, total=TOTAL_POST):
+    """Страница опубликованных постов по запросу, лучшие совпадения первыми.
+
+    Выбирается total + 1 совпадение — лишнее лишь сообщает, есть ли
+    следующая страница. Карточки собираются так же, как в ленте.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return SearchPage([], None, False)
+    after = decode_rank_cursor(cursor or '')
+    search = fts_search if use_fts() else python_search
+    ranked = search(terms, after, total + 1)
+    page, extra = ranked[:total], ranked[total:]
+    posts = get_feed_posts().in_bulk([pk for _, pk in page])
+    rows = attach_refdata([posts[pk] for _, pk in page if pk in posts])
+    return SearchPage(
+        rows, page[-1] if extra else None, after is not None
+    )
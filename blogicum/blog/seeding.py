@@ -0,0 +1,152 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from blog.feed import rebuild_feed
+from blog.models import Category, Comment, Location, Post, make_excerpt
+from blog.search import rebuild_index
+from blog.service import recount_comments
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+SEED_PASSWORD = 'seed-password'
+
+WORDS = (
+    'блог', 'путешествие', 'город', 'море', 'горы', 'лес', 'река', 'утро',
+    'вечер', 'дорога', 'поезд', 'кофе', 'книга', 'друзья', 'погода',
+    'история', 'фото', 'музей', 'парк', 'мост', 'снег', 'солнце', 'ветер',
+)
+
+
+def words(rng, count):
+    return ' '.join(rng.choices(WORDS, k=count))
+
+
+def chunks(total, size=BATCH_SIZE):
+    """Границы пакетов [start, stop) для total строк."""
+    for start in range(0, total, size):
+        yield start, min(start + size, total)
+
+
+def zipf_weights(total, exponent):
+    """Накопленные веса закона Ципфа для рангов 1..total."""
+    return list(accumulate(rank ** -exponent for rank in range(1, total + 1)))
+
+
+def choice_stream(rng, population, exponent=0, size=BATCH_SIZE):
+    """Бесконечный поток случайных элементов population.
+
+    При exponent > 0 выбор идёт по закону Ципфа: первый элемент
+    популярнее всех, хвост почти не выбирается. Элементы берутся
+    пакетами — rng.choices с накопленными весами ищет бинарным поиском
+    и не пересчитывает веса на каждый вызов.
+    """
+    cum_weights = (
+        zipf_weights(len(population), exponent) if exponent > 0 else None
+    )
+    while True:
+        yield from rng.choices(population, cum_weights=cum_weights, k=size)
+
+
+def bulk_insert(model, total, make, batch_size=BATCH_SIZE, progress=None,
+                return_ids=False):
+    """Вставка total объектов пакетами; make(i) строит i-й объект.
+
+    Каждый пакет создаётся и вставляется в своей транзакции, поэтому
+    память не растёт с размером набора, а прерванное заполнение
+    оставляет только целые пакеты. С return_ids возвращает первичные
+    ключи вставленных строк — только для моделей, на которые ссылаются
+    следующие.
+    """
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+    for start, stop in chunks(total, batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(
+                [make(i) for i in range(start, stop)], batch_size=batch_size
+            )
+        if progress is not None:
+            progress(model, stop, total)
+    if not return_ids:
+        return None
+    return list(model.objects.filter(
+        pk__gt=last or 0
+    ).order_by('pk').values_list('pk', flat=True))
+
+
+def seed(users=10_000, posts=100_000, comments=1_000_000,
+         categories=20, locations=50, comment_skew=0,
+         unpublished_categories=0, future_posts=0, random_seed=0,
+         batch_size=BATCH_SIZE, progress=None):
+    """Синтетический набор данных через пакетные bulk_create.
+
+    comment_skew — показатель закона Ципфа для числа комментариев
+    на пост (0 — равномерно), unpublished_categories и future_posts —
+    доли скрытых категорий и отложенных публикаций. progress(model,
+    done, total) вызывается после каждого пакета.
+
+    Сигналы при bulk_create не срабатывают, поэтому анонсы заполняются
+    сразу, а счётчики комментариев и лента пересобираются в конце.
+    Возвращает число созданных объектов по моделям.
+    """
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    password = make_password(SEED_PASSWORD)
+    # Метка прогона делает имена и slug уникальными при повторном запуске.
+    run = f'{now:%Y%m%d%H%M%S%f}'
+
+    user_ids = bulk_insert(User, users, lambda i: User(
+        username=f'seed_{run}_{i}', password=password,
+    ), batch_size, progress, return_ids=True)
+    category_ids = bulk_insert(Category, categories, lambda i: Category(
+        title=f'Категория {i}', description=words(rng, 12),
+        slug=f'seed-{run}-{i}',
+        is_published=rng.random() >= unpublished_categories,
+    ), batch_size, progress, return_ids=True)
+    location_ids = bulk_insert(Location, locations, lambda i: Location(
+        name=f'Место {i}',
+    ), batch_size, progress, return_ids=True)
+
+    def make_post(i):
+        text = words(rng, rng.randint(20, 200))
+        if rng.random() < future_posts:
+            pub_date = now + timedelta(minutes=rng.randint(1, 43_200))
+        else:
+            pub_date = now - timedelta(minutes=rng.randint(1, 525_600))
+        return Post(
+            title=words(rng, 4).capitalize(),
+            text=text,
+            excerpt=make_excerpt(text),
+            pub_date=pub_date,
+            author_id=rng.choice(user_ids),
+            category_id=rng.choice(category_ids),
+            location_id=rng.choice(location_ids),
+        )
+
+    post_ids = bulk_insert(
+        Post, posts, make_post, batch_size, progress, return_ids=True
+    )
+    # Популярность поста не связана с его id и датой.
+    rng.shuffle(post_ids)
+    commented = choice_stream(rng, post_ids, comment_skew)
+    bulk_insert(Comment, comments, lambda i: Comment(
+        text=words(rng, rng.randint(3, 30)),
+        post_id=next(commented),
+        author_id=rng.choice(user_ids),
+    ), batch_size, progress)
+
+    recount_comments()
+    rebuild_feed()
+    rebuild_index()
+    return {
+        'users': users,
+        'categories': categories,
+        'locations': locations,
+        'posts': posts,
+        'comments': comments,
+    }
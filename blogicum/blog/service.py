@@ -1,35 +1,298 @@
-from django.core.paginator import Paginator
-from django.db.models import Count
-from django.utils import timezone
+import asyncio
+import base64
+import binascii
 
-from blog.models import Post
-from blogicum.constants import TOTAL_POST
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
 
+from blog.cache import GLOBAL_TAG, get_tagged, post_tag
+from blog.executor import run_sync
+from blog.lookups import attach_refdata
+from blog.models import Comment, Post
+from blogicum.constants import (
+    COMMENTS_PER_PAGE, CURSOR_AFTER, CURSOR_BEFORE, TOTAL_POST
+)
 
-def get_published_posts(
-        comment_count=True,
-        on_filter=True
-):
-    """Получение опубликованных постов."""
+# Только то, что выводит includes/post_card.html; категории и места
+# подставляет attach_refdata из процессного кеша.
+POST_CARD_FIELDS = (
+    'id', 'title', 'excerpt', 'pub_date', 'is_published', 'image',
+    'image_variants', 'image_processing', 'comment_count',
+    'category', 'location', 'author', 'author__username',
+)
+
+
+def get_published_posts(on_filter=True, category=None, author=None):
+    """Получение опубликованных постов.
+
+    Опубликованные посты читаются через таблицу ленты FeedEntry:
+    видимость категории и наступление даты публикации в ней уже учтены,
+    поэтому запрос не зависит от текущего времени.
+    """
     queryset_flash = Post.objects.select_related(
         'category',
         'author',
         'location',
     )
-    if comment_count:
-        queryset_flash = queryset_flash.annotate(
-            comment_count=Count('comments')).order_by('-pub_date')
-    if on_filter:
-        queryset_flash = queryset_flash.filter(
-            is_published=True,
-            category__is_published=True,
-            pub_date__lte=timezone.now()
-        )
+    if not on_filter:
+        queryset_flash = queryset_flash.order_by('-pub_date', '-pk')
+        if category is not None:
+            queryset_flash = queryset_flash.filter(category=category)
+        if author is not None:
+            queryset_flash = queryset_flash.filter(author=author)
+        return queryset_flash
+    queryset_flash = queryset_flash.filter(
+        feed_entry__is_live=True
+    ).order_by('-feed_entry__pub_date', '-feed_entry__post')
+    if category is not None:
+        queryset_flash = queryset_flash.filter(feed_entry__category=category)
+    if author is not None:
+        queryset_flash = queryset_flash.filter(feed_entry__author=author)
     return queryset_flash
 
 
-def paginate_page(request, posts, total=TOTAL_POST):
-    paginator = Paginator(posts, total)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+def get_feed_posts(on_filter=True, category=None, author=None):
+    """Посты для карточек ленты: без полного текста и лишних колонок.
+
+    Страницу после выборки нужно пропустить через attach_refdata.
+    """
+    return get_published_posts(
+        on_filter=on_filter, category=category, author=author
+    ).select_related(None).select_related('author').only(*POST_CARD_FIELDS)
+
+
+def get_post_detail(post_id):
+    """Пост для страницы публикации из кеша; None, если поста нет.
+
+    Один поиск по первичному ключу: вместе с постом выбирается его запись
+    ленты, по которой видимость решается без повторных запросов.
+    """
+    return get_tagged(
+        f'post:{post_id}',
+        [GLOBAL_TAG, post_tag(post_id)],
+        lambda: Post.objects.select_related(
+            'category', 'author', 'location', 'feed_entry'
+        ).filter(pk=post_id).first(),
+    )
+
+
+def get_own_posts_changes(user):
+    """Время последней правки и число всех постов автора."""
+    stats = Post.objects.filter(author=user).aggregate(
+        changed_at=Max('updated_at'), total=Count('pk')
+    )
+    return stats['changed_at'], stats['total']
+
+
+def is_post_visible(post, user):
+    """Опубликованный пост виден всем, остальные — только автору."""
+    if post.author_id == user.id:
+        return True
+    entry = getattr(post, 'feed_entry', None)
+    return entry is not None and entry.is_live
+
+
+def recount_comments(using=DEFAULT_DB_ALIAS):
+    """Сверка Post.comment_count с комментариями; возвращает число правок."""
+    counts = Comment.objects.filter(
+        post=OuterRef('pk')
+    ).order_by().values('post').annotate(total=Count('pk')).values('total')
+    posts = Post.objects.using(using)
+    drifted = posts.annotate(
+        actual=Coalesce(Subquery(counts), 0)
+    ).exclude(comment_count=F('actual'))
+    return posts.filter(pk__in=Subquery(drifted.values('pk'))).update(
+        comment_count=Coalesce(Subquery(counts), 0)
+    )
+
+
+def encode_cursor(moment, pk):
+    """Курсор страницы по ключу (дата, id)."""
+    raw = f'{moment.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Разбор курсора; для испорченного значения возвращает None."""
+    try:
+        raw = base64.urlsafe_b64decode(
+            cursor + '=' * (-len(cursor) % 4)
+        ).decode()
+        pub_date, pk = raw.rsplit('|', 1)
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+class CursorPage:
+    """Страница курсорной пагинации, совместимая с шаблонами Page."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next:
+            post = self.object_list[-1]
+            return encode_cursor(post.pub_date, post.pk)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous:
+            post = self.object_list[0]
+            return encode_cursor(post.pub_date, post.pk)
+        return None
+
+
+def cursor_paginate(request, posts, total=TOTAL_POST):
+    """Пагинация без COUNT(*) и OFFSET: поиск по ключу (pub_date, id).
+
+    Поля ключа берутся из сортировки queryset, чтобы поиск шёл по тому же
+    индексу. Запрашивается total + 1 строка — лишняя строка лишь сообщает,
+    есть ли следующая страница.
+    """
+    ordering = [field.lstrip('-') for field in posts.query.order_by]
+    date_field, id_field = (
+        ordering[:2] if len(ordering) >= 2 else ('pub_date', 'pk')
+    )
+    after = decode_cursor(request.GET.get(CURSOR_AFTER, ''))
+    before = decode_cursor(request.GET.get(CURSOR_BEFORE, ''))
+    if before is not None:
+        pub_date, pk = before
+        rows = list(posts.filter(
+            Q(**{f'{date_field}__gt': pub_date})
+            | Q(**{date_field: pub_date, f'{id_field}__gt': pk})
+        ).order_by(date_field, id_field)[:total + 1])
+        if len(rows) > total:
+            return CursorPage(rows[:total][::-1], True, True)
+        after = None
+    posts = posts.order_by(f'-{date_field}', f'-{id_field}')
+    if after is not None:
+        pub_date, pk = after
+        posts = posts.filter(
+            Q(**{f'{date_field}__lt': pub_date})
+            | Q(**{date_field: pub_date, f'{id_field}__lt': pk})
+        )
+    rows = list(posts[:total + 1])
+    return CursorPage(rows[:total], len(rows) > total, after is not None)
+
+
+def paginate_comments(post_id, cursor=None, total=COMMENTS_PER_PAGE):
+    """Порция комментариев поста по ключу (created_at, id).
+
+    Возвращает комментарии и курсор следующей порции (или None).
+    """
+    comments = Comment.objects.filter(
+        post_id=post_id
+    ).select_related('author').order_by(
+        'created_at', 'pk'
+    )
+    after = decode_cursor(cursor or '')
+    if after is not None:
+        created_at, pk = after
+        comments = comments.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+        )
+    comments = list(comments[:total + 1])
+    if len(comments) <= total:
+        return comments, None
+    last = comments[total - 1]
+    return comments[:total], encode_cursor(last.created_at, last.pk)
+
+
+def use_cursor_pagination(request):
+    """Курсорный режим включён настройкой или курсором в запросе."""
+    return (
+        getattr(settings, 'BLOG_CURSOR_PAGINATION', False)
+        or CURSOR_AFTER in request.GET
+        or CURSOR_BEFORE in request.GET
+    )
+
+
+def parse_page_number(value, strict):
+    """Номер страницы из ?page=; None означает последнюю страницу.
+
+    Без strict ошибочный номер даёт первую страницу, как get_page(),
+    со strict — 404, как у ListView.
+    """
+    if value == 'last':
+        return None
+    try:
+        number = int(value or 1)
+    except (TypeError, ValueError):
+        number = 0
+    if number < 1:
+        if strict:
+            raise Http404('Неверный номер страницы.')
+        number = 1
+    return number
+
+
+def page_rows(posts, number, total):
+    return list(posts[(number - 1) * total:number * total])
+
+
+async def apaginate_page(request, posts, total=TOTAL_POST, strict=False):
+    """Страница ленты для асинхронных представлений.
+
+    Строки страницы и COUNT(*) выбираются параллельно в пуле
+    BLOG_DB_THREADS, а не друг за другом, как в Paginator.get_page().
+    Номер за последней страницей без strict даёт последнюю страницу,
+    со strict — 404.
+    """
+    if use_cursor_pagination(request):
+        page_obj = await run_sync(cursor_paginate, request, posts, total)
+    else:
+        paginator = Paginator(posts, total)
+        number = parse_page_number(request.GET.get('page'), strict)
+        if number is None:
+            paginator.count = await run_sync(posts.count)
+            number = paginator.num_pages
+            rows = await run_sync(page_rows, posts, number, total)
+        else:
+            paginator.count, rows = await asyncio.gather(
+                run_sync(posts.count),
+                run_sync(page_rows, posts, number, total),
+            )
+            if number > paginator.num_pages:
+                if strict:
+                    raise Http404('Такой страницы нет.')
+                number = paginator.num_pages
+                rows = await run_sync(page_rows, posts, number, total)
+        page_obj = Page(rows, number, paginator)
+    page_obj.object_list = await run_sync(
+        attach_refdata, page_obj.object_list
+    )
     return page_obj
@@ -0,0 +1,214 @@
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from blog import feed, search
+from blog.cache import (
+    FEED_TAG, GLOBAL_TAG, REFDATA_TAG, author_tag, category_tag,
+    invalidate_tags, post_tag
+)
+from blog.lookups import refdata
+from blog.models import Category, Comment, FeedEntry, Location, Post
+from blog.sqlite import apply_pragmas
+
+User = get_user_model()
+
+# Посты, которые сейчас удаляются в этом потоке: их комментарии уходят
+# каскадом, и счётчик с кешем для каждого из них не нужны.
+_deleting = threading.local()
+
+
+def deleting_posts():
+    if not hasattr(_deleting, 'posts'):
+        _deleting.posts = set()
+    return _deleting.posts
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleting_post(sender, instance, **kwargs):
+    deleting_posts().add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleting_post(sender, instance, **kwargs):
+    deleting_posts().discard(instance.pk)
+
+
+def change_comment_count(post_id, delta):
+    # Комментарии — часть страницы поста, поэтому пост считается
+    # изменённым; своего updated_at у комментария нет.
+    Post.objects.filter(pk=post_id, comment_count__gte=-delta).update(
+        comment_count=F('comment_count') + delta, updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw, **kwargs):
+    """Увеличение счётчика комментариев поста."""
+    if created and not raw:
+        change_comment_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Уменьшение счётчика комментариев поста."""
+    if instance.post_id not in deleting_posts():
+        change_comment_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def touch_commented_post(sender, instance, created, raw, **kwargs):
+    """Правка комментария меняет и страницу поста."""
+    if not created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Location)
+@receiver(pre_save, sender=Post)
+def fill_fixture_updated_at(sender, instance, raw, **kwargs):
+    """Фикстура без updated_at: время правки — время создания."""
+    if raw and instance.updated_at is None:
+        instance.updated_at = instance.created_at
+
+
+@receiver(post_save, sender=Post)
+def sync_feed_post(sender, instance, raw, **kwargs):
+    """Обновление записи ленты при сохранении поста."""
+    if not raw:
+        feed.sync_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw, update_fields, **kwargs):
+    """Обновление поискового индекса при правке заголовка или текста."""
+    if raw:
+        return
+    if update_fields is None or {'title', 'text'} & set(update_fields):
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_state(sender, instance, raw, **kwargs):
+    instance._was_published = (
+        None if raw or instance.pk is None
+        else Category.objects.filter(pk=instance.pk).values_list(
+            'is_published', flat=True
+        ).first()
+    )
+
+
+@receiver(post_save, sender=Category)
+def sync_feed_category(sender, instance, created, raw, **kwargs):
+    """Переключение публикации категории одним массовым запросом."""
+    if raw or created:
+        return
+    if instance._was_published != instance.is_published:
+        feed.sync_category(instance)
+
+
+def invalidate_feed(category_ids, author_ids, post_ids=()):
+    invalidate_tags(
+        FEED_TAG,
+        *(post_tag(pk) for pk in post_ids),
+        *(category_tag(slug) for slug in Category.objects.filter(
+            pk__in=category_ids
+        ).values_list('slug', flat=True)),
+        *(author_tag(username) for username in User.objects.filter(
+            pk__in=author_ids
+        ).values_list('username', flat=True)),
+    )
+
+
+@receiver(feed.feed_changed)
+def invalidate_changed_feed(
+        sender, post_ids, category_ids, author_ids, **kwargs
+):
+    """Сброс кеша страниц при правке, скрытии или выпуске поста."""
+    invalidate_feed(category_ids, author_ids, post_ids)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    """Черновики не попадают в ленту, но их страница тоже кешируется."""
+    invalidate_tags(post_tag(instance.pk))
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance, **kwargs):
+    invalidate_feed(
+        {instance.category_id}, {instance.author_id}, {instance.pk}
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_count(sender, instance, **kwargs):
+    """Счётчик комментариев виден в карточке поста в ленте."""
+    if instance.post_id in deleting_posts():
+        return
+    invalidate_tags(post_tag(instance.post_id))
+    entry = FeedEntry.objects.filter(
+        post_id=instance.post_id, is_live=True
+    ).values('category_id', 'author_id').first()
+    if entry:
+        invalidate_feed({entry['category_id']}, {entry['author_id']})
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_all_pages(sender, **kwargs):
+    """Категории и места выводятся в карточках на всех страницах."""
+    invalidate_tags(GLOBAL_TAG, REFDATA_TAG)
+    transaction.on_commit(refdata.clear)
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, raw, update_fields, **kwargs):
+    if (
+        raw or instance.pk is None
+        or (update_fields is not None and 'username' not in update_fields)
+    ):
+        instance._old_username = instance.username
+    else:
+        instance._old_username = User.objects.filter(
+            pk=instance.pk
+        ).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_pages(sender, instance, created, update_fields,
+                            **kwargs):
+    """Имя пользователя видно на всех страницах, остальное — в профиле."""
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    if instance._old_username != instance.username:
+        invalidate_tags(GLOBAL_TAG)
+    else:
+        invalidate_tags(author_tag(instance.username))
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """PRAGMA профиля BLOG_SQLITE_PRAGMAS на новом соединении SQLite."""
+    if connection.vendor == 'sqlite' and settings.BLOG_SQLITE_PRAGMAS:
+        with connection.cursor() as cursor:
+            apply_pragmas(cursor, settings.BLOG_SQLITE_PRAGMAS)
@@ -0,0 +1,24 @@
+from django.core.exceptions import ImproperlyConfigured
+
+# PRAGMA, которые можно задать в профиле: значения подставляются
+# в SQL как есть, поэтому имена проверяются.
+PRAGMAS = (
+    'journal_mode', 'synchronous', 'busy_timeout', 'cache_size',
+    'mmap_size', 'temp_store',
+)
+
+
+def apply_pragmas(cursor, pragmas):
+    """Выполнение PRAGMA профиля на курсоре нового соединения."""
+    for name, value in pragmas.items():
+        if name not in PRAGMAS:
+            raise ImproperlyConfigured(f'Неизвестная PRAGMA SQLite: {name}')
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def read_pragmas(cursor, names=PRAGMAS):
+    values = {}
+    for name in names:
+        cursor.execute(f'PRAGMA {name}')
+        values[name] = cursor.fetchone()[0]
+    return values
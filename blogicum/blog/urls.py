@@ -37,6 +37,11 @@ posts_urls = [
         views.delete_comment,
         name='delete_comment'
     ),
+    path(
+        '<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path(
         '<int:post_id>/',
         views.post_detail,
@@ -51,7 +56,7 @@ urlpatterns = [
     ),
     path(
         'category/<slug:category_slug>/',
-        views.CategoryPostsView.as_view(),
+        views.category_posts,
         name='category_posts'
     ),
     path(
@@ -59,6 +64,11 @@ urlpatterns = [
         views.index,
         name='index'
     ),
+    path(
+        'search/',
+        views.search,
+        name='search'
+    ),
     path(
         'profile/<str:username>/',
         views.profile,
@@ -1,79 +1,135 @@
+import asyncio
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.middleware import get_user
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from django.views.generic import CreateView, ListView, UpdateView
+from django.views.generic import CreateView, UpdateView
 
+from blog.cache import (
+    FEED_TAG, author_tag, cache_anonymous_page, category_tag,
+    conditional_page, post_tag
+)
+from blog.executor import run_sync
 from blog.forms import CommentForm, PostForm, ProfileForm
-from blog.models import Category, Comment, Post
-from blog.service import get_published_posts, paginate_page
-from blogicum.constants import TOTAL_POST
+from blog.lookups import get_category_by_slug
+from blog.models import Comment, Post
+from blog.routers import replica_reads
+from blog.search import search_posts
+from blog.service import (
+    apaginate_page, get_feed_posts, get_own_posts_changes, get_post_detail,
+    is_post_visible, paginate_comments
+)
+from blog.writer import run_write
+from blogicum.constants import CURSOR_AFTER
 
 User = get_user_model()
 
 
-def index(request):
+def feed_tags(request):
+    return [FEED_TAG]
+
+
+def post_tags(request, post_id):
+    return [post_tag(post_id)]
+
+
+def category_tags(request, category_slug):
+    return [category_tag(category_slug)]
+
+
+def author_tags(request, username):
+    return [author_tag(username)]
+
+
+def own_profile_changes(request, username):
+    """Черновики и отложенные посты видит только автор, теги их не ведут."""
+    if request.user.username != username:
+        return None
+    return get_own_posts_changes(request.user)
+
+
+@replica_reads
+@conditional_page(feed_tags)
+@cache_anonymous_page(feed_tags)
+async def index(request):
     """Отображение постов на главной странице."""
-    posts = get_published_posts()
-    context = {'page_obj': paginate_page(request, posts)}
-    return render(request, 'blog/index.html', context)
+    posts = get_feed_posts()
+    context = {'page_obj': await apaginate_page(request, posts)}
+    return await run_sync(render, request, 'blog/index.html', context)
+
 
+def get_visible_post(request, post_id):
+    post = get_post_detail(post_id)
+    if post is None or not is_post_visible(post, request.user):
+        raise Http404
+    return post
 
-def post_detail(request, post_id):
+
+@replica_reads
+@conditional_page(post_tags)
+async def post_detail(request, post_id):
     """Страница с полной публикацией из блога."""
-    if request.user.is_authenticated:
-        post = get_object_or_404(
-            Post.objects.filter(
-                pk=post_id,
-                author=request.user
-            ) | get_published_posts(
-                comment_count=False,
-            ).filter(pk=post_id)
-        )
-    else:
-        post = get_object_or_404(
-            get_published_posts(
-                comment_count=False,
-            ),
-            pk=post_id
-        )
-    form = CommentForm()
-    comments = post.comments.select_related('author').all()
+    post, user, (comments, next_cursor) = await asyncio.gather(
+        run_sync(get_post_detail, post_id),
+        run_sync(get_user, request),
+        run_sync(paginate_comments, post_id),
+    )
+    if post is None or not is_post_visible(post, user):
+        raise Http404
+    context = {
+        'form': CommentForm(),
+        'post': post,
+        'comments': comments,
+        'next_cursor': next_cursor,
+    }
+    return await run_sync(render, request, 'blog/detail.html', context)
+
+
+@replica_reads
+def post_comments(request, post_id):
+    """Следующая порция комментариев поста для подгрузки."""
+    post = get_visible_post(request, post_id)
+    comments, next_cursor = paginate_comments(
+        post.pk, request.GET.get(CURSOR_AFTER)
+    )
     context = {
-        'form': form,
         'post': post,
-        'comments': comments
+        'comments': comments,
+        'next_cursor': next_cursor,
     }
-    return render(request, 'blog/detail.html', context)
+    return render(request, 'includes/comment_list.html', context)
 
 
-class CategoryPostsView(ListView):
+@replica_reads
+@conditional_page(category_tags)
+@cache_anonymous_page(category_tags)
+async def category_posts(request, category_slug):
     """Отображение постов в категории."""
+    # Категория берётся из процессного кеша refdata, обычно без запроса;
+    # строки страницы и COUNT(*) дальше идут параллельно.
+    category = await run_sync(get_category_by_slug, category_slug)
+    if category is None or not category.is_published:
+        raise Http404
+    page_obj = await apaginate_page(
+        request, get_feed_posts(category=category), strict=True
+    )
+    context = {'category': category, 'page_obj': page_obj}
+    return await run_sync(render, request, 'blog/category.html', context)
 
-    model = Post
-    template_name = 'blog/category.html'
-    context_object_name = 'posts'
-    paginate_by = TOTAL_POST
-
-    def get_queryset(self):
-        category_slug = self.kwargs['category_slug']
-        category = get_object_or_404(
-            Category,
-            slug=category_slug,
-            is_published=True
-        )
-        return get_published_posts().filter(
-            category=category,
-        )
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['category'] = get_object_or_404(
-            Category,
-            slug=self.kwargs['category_slug']
-        )
-        return context
+@replica_reads
+async def search(request):
+    """Поиск по заголовкам и текстам опубликованных постов."""
+    query = request.GET.get('q', '').strip()
+    page_obj = await run_sync(
+        search_posts, query, request.GET.get(CURSOR_AFTER)
+    )
+    context = {'query': query, 'page_obj': page_obj}
+    return await run_sync(render, request, 'blog/search.html', context)
 
 
 class PostCreateView(LoginRequiredMixin, CreateView):
@@ -85,7 +141,8 @@ class PostCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        return super().form_valid(form)
+        self.object = run_write(form.save)
+        return redirect(self.get_success_url())
 
     def get_success_url(self):
         return reverse(
@@ -96,17 +153,23 @@ class PostCreateView(LoginRequiredMixin, CreateView):
         )
 
 
-def profile(request, username):
+@replica_reads
+@conditional_page(author_tags, own_profile_changes)
+@cache_anonymous_page(author_tags)
+async def profile(request, username):
     """Профиль пользователя."""
-    user = get_object_or_404(User, username=username)
-    posts = get_published_posts(
-        on_filter=request.user != user
-    ).filter(author=user)
+    user, viewer = await asyncio.gather(
+        run_sync(User.objects.filter(username=username).first),
+        run_sync(get_user, request),
+    )
+    if user is None:
+        raise Http404
+    posts = get_feed_posts(on_filter=viewer != user, author=user)
     context = {
         'profile': user,
-        'page_obj': paginate_page(request, posts),
+        'page_obj': await apaginate_page(request, posts),
     }
-    return render(request, 'blog/profile.html', context)
+    return await run_sync(render, request, 'blog/profile.html', context)
 
 
 class CommentCreateView(LoginRequiredMixin, CreateView):
@@ -123,7 +186,8 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
             Post,
             pk=self.kwargs['post_id']
         )
-        return super().form_valid(form)
+        self.object = run_write(form.save)
+        return redirect(self.get_success_url())
 
     def get_success_url(self):
         return reverse(
@@ -179,7 +243,7 @@ def edit_comment(request, post_id, comment_id):
         return redirect('blog:post_detail', post_id=post_id)
     form = CommentForm(request.POST or None, instance=comment)
     if form.is_valid():
-        form.save()
+        run_write(form.save)
         return redirect('blog:post_detail', post_id)
     context = {
         'form': form,
@@ -212,7 +276,7 @@ def edit_profile(request):
     instance = request.user
     form = ProfileForm(request.POST or None, instance=request.user)
     if form.is_valid():
-        form.save()
+        run_write(form.save)
         return redirect(
             'blog:profile',
             username=instance.username
@@ -0,0 +1,150 @@
+import contextvars
+import functools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from blogicum.querycount import attach_current_log
+
+_STOP = object()
+
+
+def call_logged(func):
+    # Запросы записи попадают в учёт запроса, который её поставил.
+    with attach_current_log():
+        return func()
+
+
+class WriteQueue:
+    """Единственный поток-писатель с групповым коммитом.
+
+    Записи, скопившиеся в очереди, пока шёл прошлый коммит, выполняются
+    в одной транзакции, каждая в своей точке сохранения, и платят за один
+    fsync на всех. Ошибка одной записи откатывает только её точку
+    сохранения и возвращается в её future; результаты отдаются только
+    после коммита.
+
+    Записи могут выполниться повторно, поэтому побочные эффекты вне БД
+    (сброс кеша, удаление файлов) они откладывают в on_commit: колбэки
+    откаченной попытки Django отбрасывает вместе с её точкой сохранения.
+    """
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.commits = 0
+        self.writes = 0
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        self._queue.put((
+            contextvars.copy_context(),
+            functools.partial(func, *args, **kwargs),
+            future,
+        ))
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='blog-writer', daemon=True
+                )
+                self._thread.start()
+        return future
+
+    def stop(self):
+        """Остановка потока после уже поставленных записей."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + settings.BLOG_WRITE_WINDOW
+        while (
+            len(batch) < settings.BLOG_WRITE_BATCH
+            and batch[-1] is not _STOP
+        ):
+            timeout = deadline - time.monotonic()
+            try:
+                batch.append(
+                    self._queue.get(timeout=timeout) if timeout > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            stop = batch[-1] is _STOP
+            if stop:
+                batch.pop()
+            if batch:
+                close_old_connections()
+                self._commit(batch)
+            if stop:
+                connection.close()
+                return
+
+    def _commit(self, batch):
+        batch = [
+            (context, func, future) for context, func, future in batch
+            if future.set_running_or_notify_cancel()
+        ]
+        try:
+            with transaction.atomic():
+                outcomes = [
+                    self._apply(context, func) for context, func, _ in batch
+                ]
+            self.commits += 1
+        except Exception:
+            # Пачка не закоммитилась (например, на отложенной проверке
+            # внешних ключей SQLite): каждая запись повторяется в своей
+            # транзакции, чтобы ошибка досталась только виновной.
+            outcomes = []
+            for context, func, _ in batch:
+                try:
+                    with transaction.atomic():
+                        outcome = self._apply(context, func)
+                except Exception as error:
+                    outcome = (None, error)
+                outcomes.append(outcome)
+                self.commits += 1
+        self.writes += len(batch)
+        for (_, _, future), (result, error) in zip(batch, outcomes):
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    @staticmethod
+    def _apply(context, func):
+        try:
+            with transaction.atomic():
+                return context.run(call_logged, func), None
+        except Exception as error:
+            return None, error
+
+
+writer = WriteQueue()
+
+
+def run_write(func, *args, **kwargs):
+    """Запись через очередь при BLOG_WRITE_QUEUE, иначе на месте.
+
+    Возвращает результат func, например сохранённый объект с id, или
+    поднимает её исключение. Внутри открытой транзакции запись идёт
+    на месте: поток-писатель не увидит её незакоммиченных данных.
+    """
+    if not settings.BLOG_WRITE_QUEUE or connection.in_atomic_block:
+        return func(*args, **kwargs)
+    return writer.submit(func, *args, **kwargs).result(
+        settings.BLOG_WRITE_TIMEOUT
+    )
@@ -2,3 +2,14 @@ MAX_LENGTH = 256
 TOTAL = 5
 TOTAL_POST = 10
 TEXT_LENGTH = 30
+CURSOR_AFTER = 'after'
+CURSOR_BEFORE = 'before'
+EXCERPT_WORDS = 10
+COMMENTS_PER_PAGE = 20
+IMAGE_VARIANT_WIDTHS = (480, 960, 1600)
+IMAGE_CARD_WIDTH = 480
+IMAGE_DETAIL_WIDTH = 960
+SEARCH_MAX_TERMS = 8
+SEARCH_TERM_LENGTH = 64
+SEARCH_TITLE_WEIGHT = 5.0
+ADMIN_SEARCH_LIMIT = 1000
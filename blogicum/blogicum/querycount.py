@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import re
+import sys
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+from django.urls import Resolver404, resolve
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger(__name__)
+
+# Открытые записи, от внешней к внутренней: через них к записям
+# подключаются потоки пула ORM и писатель.
+current_logs = ContextVar('current_logs', default=())
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\bIN \((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """SQL без литералов: одинаковые запросы с разными id совпадают."""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('IN (...)', sql.replace('%s', '?'))
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def query_origin():
+    """Шаблон и строка кода проекта, из которых выполнен запрос."""
+    template = code = None
+    frame = sys._getframe(1)
+    base_dir = str(settings.BASE_DIR)
+    while frame is not None and not (template and code):
+        # type() вместо isinstance: ленивые объекты вроде request.user
+        # вычисляются при обращении к __class__.
+        owner = frame.f_locals.get('self')
+        if template is None and issubclass(type(owner), Template):
+            template = owner.origin.template_name
+        filename = frame.f_code.co_filename
+        if (
+            code is None
+            and filename.startswith(base_dir)
+            and filename != __file__
+        ):
+            code = f'{filename[len(base_dir) + 1:]}:{frame.f_lineno}'
+        frame = frame.f_back
+    return template, code
+
+
+class QueryLog:
+    """Запросы к БД за время записи: SQL, длительность и источник."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        origin = query_origin()
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                (sql, time.perf_counter() - started, origin)
+            )
+
+    def __len__(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(duration for _, duration, _ in self.queries)
+
+    def repeated(self, threshold):
+        """Отпечатки, встретившиеся больше threshold раз, с источниками."""
+        origins = defaultdict(list)
+        for sql, _, origin in self.queries:
+            origins[fingerprint(sql)].append(origin)
+        return {
+            sql: (len(found), set(found))
+            for sql, found in origins.items() if len(found) > threshold
+        }
+
+
+@contextmanager
+def log_connections(*logs):
+    """Подключение записей к соединениям текущего потока."""
+    with ExitStack() as stack:
+        for log in logs:
+            for connection in connections.all():
+                if log not in connection.execute_wrappers:
+                    stack.enter_context(connection.execute_wrapper(log))
+        yield
+
+
+def attach_current_log():
+    """Записи текущего контекста для соединений другого потока."""
+    return log_connections(*current_logs.get())
+
+
+@contextmanager
+def record_queries():
+    """Запись всех запросов ко всем базам внутри блока with.
+
+    Учитываются и запросы из других потоков, если они подключаются
+    через attach_current_log(). Вложенные записи не мешают внешней:
+    запрос попадает во все открытые.
+    """
+    log = QueryLog()
+    token = current_logs.set(current_logs.get() + (log,))
+    try:
+        with log_connections(log):
+            yield log
+    finally:
+        current_logs.reset(token)
+
+
+def url_name(path):
+    try:
+        return resolve(urlsplit(path).path).view_name
+    except Resolver404:
+        return None
+
+
+def query_budget(path):
+    return settings.QUERY_BUDGETS.get(url_name(path))
+
+
+def report(request, response, log):
+    response['X-DB-Query-Count'] = len(log)
+    response['X-DB-Time'] = f'{log.total_time * 1e3:.2f}'
+    threshold = settings.QUERY_REPEAT_THRESHOLD
+    for sql, (count, origins) in log.repeated(threshold).items():
+        logger.warning(
+            'N+1 на %s: %d повторов запроса %s; источники: %s',
+            request.path, count, sql, sorted(origins, key=str),
+        )
+    budget = query_budget(request.path_info)
+    if budget is not None and len(log) > budget:
+        logger.warning(
+            'Бюджет запросов %s превышен: %d > %d',
+            request.path, len(log), budget,
+        )
+    return response
+
+
+@sync_and_async_middleware
+def query_count_middleware(get_response):
+    """Учёт запросов к БД на каждый запрос вне боевого режима.
+
+    Добавляет заголовки X-DB-Query-Count и X-DB-Time (мс), предупреждает
+    о повторах одного отпечатка SQL (N+1) и о превышении бюджета
+    QUERY_BUDGETS для имени URL. Работает и под ASGI без перехода
+    в поток.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not settings.QUERY_INSTRUMENTATION:
+                return await get_response(request)
+            with record_queries() as log:
+                response = await get_response(request)
+            return report(request, response, log)
+    else:
+        def middleware(request):
+            if not settings.QUERY_INSTRUMENTATION:
+                return get_response(request)
+            with record_queries() as log:
+                response = get_response(request)
+            return report(request, response, log)
+    return middleware
+
+
+def assert_query_budget(client, path, budget=None, **extra):
+    """GET через тестовый клиент с проверкой бюджета запросов.
+
+    Бюджет по умолчанию берётся из QUERY_BUDGETS по имени URL.
+    """
+    budget = query_budget(path) if budget is None else budget
+    assert budget is not None, f'Для {path} не объявлен бюджет запросов.'
+    with record_queries() as log:
+        response = client.get(path, **extra)
+    assert len(log) <= budget, (
+        f'{path}: {len(log)} запросов к БД при бюджете {budget}:\n'
+        + '\n'.join(sql for sql, _, _ in log.queries)
+    )
+    return response
@@ -1,12 +1,18 @@
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'django-insecure-s0s(qlnq4_smh@=ctyw5^^51v!2_nd4#$t2xy+bq0ofi^a%pe='
 
-DEBUG = True
+# Боевой режим: BLOGICUM_PRODUCTION=1 в окружении воркера.
+PRODUCTION = os.environ.get('BLOGICUM_PRODUCTION') == '1'
+
+DEBUG = not PRODUCTION
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = os.environ.get('BLOGICUM_ALLOWED_HOSTS', '').split()
 
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
@@ -27,11 +33,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blogicum.querycount.query_count_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog.routers.primary_after_write_middleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -42,7 +50,7 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
+        'APP_DIRS': not PRODUCTION,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -54,15 +62,77 @@ TEMPLATES = [
     },
 ]
 
+if PRODUCTION:
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+# Компиляция шаблонов из TEMPLATES_DIR при старте воркера (wsgi/asgi).
+TEMPLATE_PRECOMPILE = PRODUCTION
+
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
+# Профили SQLite: PRAGMA, которые выполняются на каждом новом соединении
+# (blog.signals.tune_sqlite). production: WAL — чтение не ждёт записи;
+# synchronous=NORMAL — в WAL fsync только на checkpoint, база при сбое
+# остаётся целой; кеш страниц 64 МБ и mmap 256 МБ; временные таблицы
+# в памяти; ожидание блокировки до 5 с вместо «database is locked».
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -64 * 1024,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    },
+}
+
+SQLITE_PROFILE = os.environ.get(
+    'BLOGICUM_SQLITE_PROFILE', 'production' if PRODUCTION else 'default'
+)
+
+BLOG_SQLITE_PRAGMAS = SQLITE_PROFILES[SQLITE_PROFILE]
+
+# Постоянные соединения: PRAGMA и открытие файла — раз в 10 минут,
+# а не на каждый запрос. Число соединений ограничено пулом
+# BLOG_DB_THREADS и потоками WSGI-сервера.
+CONN_MAX_AGE = 600 if SQLITE_PROFILE == 'production' else 0
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': CONN_MAX_AGE,
     }
 }
 
+# Реплики для чтения ленты и публикаций: пути к копиям SQLite через
+# пробел в BLOGICUM_REPLICA_DBS; копии обновляет manage.py sync_replica.
+for number, name in enumerate(
+        os.environ.get('BLOGICUM_REPLICA_DBS', '').split(), 1
+):
+    DATABASES[f'replica_{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+BLOG_REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+
+# Сколько секунд после записи сессия читает с основной БД.
+BLOG_PRIMARY_STICKY = 30
+
+# Срок кеша для данных, прочитанных с реплики: она может отставать.
+BLOG_REPLICA_CACHE_TIMEOUT = 30
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -101,3 +171,120 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
 MEDIA_ROOT = BASE_DIR / 'media'
+
+BLOG_CURSOR_PAGINATION = False
+
+# Кеш страниц, объектов и версий тегов общий для всех процессов:
+# веб-воркеров, publish_scheduled, process_images, загрузчиков, — иначе
+# сброс тега в одном процессе не дойдёт до остальных. BLOGICUM_CACHE:
+# file — каталог BLOGICUM_CACHE_DIR; db — таблица blog_cache
+# (manage.py createcachetable); redis://… — через django-redis;
+# locmem — кеш одного процесса, кеш страниц и объектов тогда выключен.
+CACHE_URL = os.environ.get('BLOGICUM_CACHE', 'file')
+
+if CACHE_URL == 'file':
+    CACHE_BACKEND = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('BLOGICUM_CACHE_DIR', BASE_DIR / 'cache'),
+    }
+elif CACHE_URL == 'db':
+    CACHE_BACKEND = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'blog_cache',
+    }
+elif CACHE_URL.startswith(('redis://', 'rediss://', 'unix://')):
+    CACHE_BACKEND = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': CACHE_URL,
+    }
+elif CACHE_URL == 'locmem':
+    CACHE_BACKEND = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+else:
+    raise ImproperlyConfigured(f'Неизвестный BLOGICUM_CACHE: {CACHE_URL}')
+
+# Вытесненная версия тега просто заменяется новой, поэтому лимит
+# записей безопасен; по умолчанию у file и db он всего 300. Оба считают
+# записи на каждой записи в кеш: под нагрузкой нужен Redis.
+CACHE_BACKEND.setdefault('OPTIONS', {})['MAX_ENTRIES'] = 10_000
+
+CACHES = {'default': CACHE_BACKEND}
+
+BLOG_PAGE_CACHE = CACHE_URL != 'locmem'
+
+BLOG_PAGE_CACHE_TIMEOUT = 300
+
+BLOG_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+BLOG_OBJECT_CACHE_TIMEOUT = 60 * 60
+
+BLOG_REFDATA_CACHE_SIZE = 1024
+
+BLOG_REFDATA_MAX_AGE = 60
+
+# Очередь обработки фото (manage.py process_images).
+BLOG_IMAGE_WORKERS = 2
+
+BLOG_IMAGE_JOB_ATTEMPTS = 3
+
+BLOG_IMAGE_JOB_LEASE = 10 * 60
+
+# Потоки для ORM асинхронных представлений под ASGI; 0 — общий
+# thread_sensitive-поток Django.
+BLOG_DB_THREADS = 8
+
+# Поиск по постам: 'auto' — FTS5, если SQLite собран с ним, иначе
+# обратный индекс SearchPosting; 'python' — всегда SearchPosting.
+BLOG_SEARCH_BACKEND = 'auto'
+
+# Списки админки считают не больше строк; для таблицы без фильтров
+# число строк берётся из статистики БД.
+BLOG_ADMIN_COUNT_LIMIT = 10_000
+
+# Очередь записи: посты, комментарии и профили из форм сохраняет один
+# поток, объединяя записи, скопившиеся за время прошлого коммита,
+# в одну транзакцию. BLOG_WRITE_WINDOW — сколько секунд ждать записей
+# для пачки сверх уже поставленных; BLOG_WRITE_TIMEOUT — сколько
+# запрос ждёт своей записи. Включается BLOGICUM_WRITE_QUEUE=1.
+BLOG_WRITE_QUEUE = os.environ.get('BLOGICUM_WRITE_QUEUE') == '1'
+BLOG_WRITE_BATCH = 64
+BLOG_WRITE_WINDOW = 0
+BLOG_WRITE_TIMEOUT = 30
+
+# Отчёты проекта в stderr воркера, например о прогреве шаблонов при
+# старте. Без этого Django не выводит их INFO.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'blogicum': {'handlers': ['console'], 'level': 'INFO'},
+        'blog': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
+# Учёт запросов к БД: заголовки X-DB-*, поиск N+1 и бюджеты по имени URL.
+QUERY_INSTRUMENTATION = not PRODUCTION
+
+QUERY_REPEAT_THRESHOLD = 5
+
+QUERY_BUDGETS = {
+    'blog:index': 6,
+    'blog:category_posts': 6,
+    'blog:profile': 7,
+    'blog:post_detail': 5,
+    'blog:post_comments': 4,
+    'blog:search': 4,
+    'blog:create_post': 4,
+    'blog:edit_post': 7,
+    'blog:delete_post': 3,
+    'blog:add_comment': 2,
+    'blog:edit_comment': 5,
+    'blog:delete_comment': 5,
+    'blog:edit_profile': 2,
+    'pages:about': 2,
+    'pages:rules': 2,
+}
@@ -41,6 +41,36 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def db_threads_in_main_thread(settings):
+    # Тестовая БД открыта в транзакции соединения основного потока:
+    # асинхронные представления должны ходить в неё через него же.
+    settings.BLOG_DB_THREADS = 0
+
+
+@pytest.fixture(autouse=True)
+def run_on_commit_immediately(request, monkeypatch):
+    # Обычный тест с БД идёт в транзакции, которая не коммитится:
+    # действия после коммита (сброс кеша) выполняются сразу.
+    marker = request.node.get_closest_marker("django_db")
+    transactional = "transactional_db" in request.fixturenames or (
+        marker is not None and marker.kwargs.get("transaction", False)
+    )
+    if not transactional:
+        monkeypatch.setattr(
+            "django.db.transaction.on_commit",
+            lambda func, using=None: func(),
+        )
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -363,6 +393,7 @@ def cleanup(request):
                     filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
+                    or filename.endswith(".webp")
             ):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
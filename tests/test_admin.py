@@ -0,0 +1,94 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+User = get_user_model()
+
+CHANGELISTS = ('/admin/blog/post/', '/admin/blog/comment/')
+
+
+def changelist_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, url
+    return response, [query['sql'] for query in queries.captured_queries]
+
+
+@pytest.mark.parametrize('url', CHANGELISTS)
+def test_changelist_queries_do_not_grow_with_rows(
+        admin_client, mixer, user, published_category, url
+):
+    def add_rows(count):
+        posts = mixer.cycle(count).blend(
+            'blog.Post', author=user, category=published_category
+        )
+        mixer.cycle(count).blend(
+            'blog.Comment', post=mixer.sequence(*posts), author=user
+        )
+
+    add_rows(2)
+    _, few = changelist_queries(admin_client, url)
+    add_rows(20)
+    _, many = changelist_queries(admin_client, url)
+    assert len(many) == len(few), (
+        f'Убедитесь, что список {url} не делает запросов на каждую строку.'
+    )
+    counts = [sql for sql in many if 'COUNT(' in sql]
+    assert len(counts) <= 1, (
+        f'Убедитесь, что список {url} не считает строки дважды.'
+    )
+
+
+def test_changelist_uses_estimated_count(
+        admin_client, settings, mixer, user, published_category
+):
+    settings.BLOG_ADMIN_COUNT_LIMIT = 3
+    mixer.cycle(5).blend('blog.Post', author=user, category=published_category)
+    response, sql = changelist_queries(admin_client, CHANGELISTS[0])
+    assert not any('COUNT(' in query for query in sql), (
+        'Убедитесь, что без фильтров число строк оценивается без COUNT(*).'
+    )
+    assert response.context['cl'].result_count == 5
+
+    response, sql = changelist_queries(
+        admin_client, f'{CHANGELISTS[0]}?is_published__exact=1'
+    )
+    assert response.context['cl'].result_count == 3, (
+        'Убедитесь, что с фильтром строки считаются с ограничением.'
+    )
+
+
+def test_post_filters_do_not_list_authors(admin_client, mixer):
+    usernames = [user.username for user in mixer.cycle(5).blend(User)]
+    response, _ = changelist_queries(admin_client, CHANGELISTS[0])
+    content = response.content.decode()
+    assert not any(username in content for username in usernames), (
+        'Убедитесь, что в фильтрах списка постов нет всех пользователей.'
+    )
+
+
+def test_post_search(admin_client, mixer, user, published_category):
+    by_text = mixer.blend(
+        'blog.Post', title='Заметка', text='Про горный велосипед',
+        category=published_category,
+    )
+    by_author = mixer.blend(
+        'blog.Post', author=user, category=published_category
+    )
+    mixer.blend('blog.Post', title='Другое', category=published_category)
+
+    def found(query):
+        response = admin_client.get(CHANGELISTS[0], {'q': query})
+        return {post.pk for post in response.context['cl'].result_list}
+
+    assert found('велосипед') == {by_text.pk}, (
+        'Убедитесь, что админка ищет посты по поисковому индексу.'
+    )
+    assert found(user.username) == {by_author.pk}, (
+        'Убедитесь, что админка ищет посты по имени автора.'
+    )
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient
+
+from blog import views
+
+
+@pytest.mark.parametrize(
+    'view', ('index', 'post_detail', 'profile', 'category_posts')
+)
+def test_read_views_are_async(view):
+    assert asyncio.iscoroutinefunction(getattr(views, view)), (
+        f'Убедитесь, что представление `{view}` асинхронное.'
+    )
+
+
+@pytest.mark.django_db
+def test_page_out_of_range(
+        client, published_category, many_posts_with_published_locations
+):
+    response = client.get('/?page=1000')
+    assert response.status_code == HTTPStatus.OK
+    page_obj = response.context['page_obj']
+    assert page_obj.number == page_obj.paginator.num_pages, (
+        'Убедитесь, что номер за последней страницей главной даёт '
+        'последнюю страницу.'
+    )
+    response = client.get(
+        f'/category/{published_category.slug}/?page=1000'
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        'Убедитесь, что несуществующая страница категории отдаёт 404.'
+    )
+    response = client.get(f'/category/{published_category.slug}/?page=last')
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db(transaction=True)
+def test_queries_run_in_db_pool(
+        settings, user, published_category, post_with_published_location
+):
+    settings.BLOG_DB_THREADS = 2
+    threads = set()
+
+    def remember_thread(sender, **kwargs):
+        threads.add(threading.current_thread().name)
+
+    connection_created.connect(remember_thread)
+    try:
+        client = AsyncClient()
+        for url in (
+            '/',
+            f'/category/{published_category.slug}/',
+            f'/profile/{user.username}/',
+            f'/posts/{post_with_published_location.pk}/',
+        ):
+            response = async_to_sync(client.get)(url)
+            assert response.status_code == HTTPStatus.OK, url
+    finally:
+        connection_created.disconnect(remember_thread)
+    assert threads and all(
+        name.startswith('blog-db') for name in threads
+    ), (
+        'Убедитесь, что асинхронные представления обращаются к БД '
+        'из пула BLOG_DB_THREADS.'
+    )
+
+
+@pytest.mark.django_db
+def test_queries_are_recorded_without_db_pool(post_with_published_location):
+    from blog.executor import run_sync
+    from blog.models import Post
+    from blogicum.querycount import record_queries
+
+    async def count_posts():
+        with record_queries() as log:
+            total = await run_sync(Post.objects.count)
+        return total, len(log)
+
+    assert async_to_sync(count_posts)() == (1, 1), (
+        'Убедитесь, что при BLOG_DB_THREADS = 0 запросы из run_sync '
+        'тоже попадают в учёт.'
+    )
@@ -0,0 +1,77 @@
+import pytest
+
+from blog.benchmark import compare, run_benchmark, url_names
+from blog.models import Comment, FeedEntry, Post
+from blog.seeding import seed
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_seed_builds_derived_data():
+    created = seed(
+        users=5, posts=40, comments=120, categories=3, locations=2,
+        batch_size=16,
+    )
+    assert created['posts'] == Post.objects.count() == 40
+    assert Comment.objects.count() == 120
+    assert sum(
+        Post.objects.values_list('comment_count', flat=True)
+    ) == 120, 'Убедитесь, что после заполнения пересчитаны комментарии.'
+    assert FeedEntry.objects.filter(is_live=True).count() == 40, (
+        'Убедитесь, что после заполнения пересобрана лента.'
+    )
+    assert all(post.excerpt for post in Post.objects.all())
+
+
+def test_benchmark_covers_every_url_name():
+    seed(users=5, posts=40, comments=120, categories=3, locations=2)
+    results = run_benchmark(requests=3, warmup=1)
+    measured = {key.split(' [')[0] for key in results}
+    assert measured == set(url_names()), (
+        'Убедитесь, что бенчмарк проходит по всем маршрутам blog и pages.'
+    )
+    for key, row in results.items():
+        assert 'skipped' not in row, key
+        assert row['requests'] == 3
+        assert row['p50_ms'] <= row['p95_ms'] <= row['p99_ms']
+        assert set(row['statuses']) <= {'200'}, (key, row['statuses'])
+    assert results['blog:index [anonymous]']['bytes_mean'] > 0
+
+    rows = compare(results, results)
+    assert rows and all(row['p99_ms'] == 0 for row in rows)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_counts_queries_from_db_pool(settings):
+    settings.BLOG_DB_THREADS = 2
+    seed(users=5, posts=40, comments=120, categories=3, locations=2)
+    results = run_benchmark(
+        requests=2, warmup=0, names=['blog:index', 'blog:post_detail']
+    )
+    for key in ('blog:index [reader]', 'blog:post_detail [reader]'):
+        assert results[key]['queries_mean'] > 0, (
+            'Убедитесь, что бенчмарк считает запросы асинхронных '
+            'представлений из пула BLOG_DB_THREADS.'
+        )
+
+
+def test_benchmark_cache_is_private(settings, tmp_path):
+    from django.core.cache import cache
+    from django.test import override_settings
+
+    from blog.management.commands.benchmark import private_caches
+
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path / 'site'),
+    }}
+    cache.set('page', 'сайт')
+    with override_settings(CACHES=private_caches(str(tmp_path / 'bench'))):
+        assert cache.get('page') is None, (
+            'Убедитесь, что бенчмарк не читает общий кеш сайта.'
+        )
+        cache.set('page', 'бенчмарк')
+        cache.clear()
+    assert cache.get('page') == 'сайт', (
+        'Убедитесь, что бенчмарк не трогает общий кеш сайта.'
+    )
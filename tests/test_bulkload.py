@@ -0,0 +1,164 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+from blog.bulkload import iter_json_array, load_fixture
+from blog.models import Category, Comment, FeedEntry, Post, SearchPosting
+from blog.search import FTS_TABLE, use_fts
+
+pytestmark = [pytest.mark.django_db]
+
+DB_JSON = Path(__file__).resolve().parent.parent / 'blogicum' / 'db.json'
+
+
+def snapshot():
+    # dumpdata хранит время с точностью до миллисекунд.
+    return {
+        post.pk: (
+            post.created_at.replace(
+                microsecond=post.created_at.microsecond // 1000 * 1000
+            ),
+            post.comment_count,
+        )
+        for post in Post.objects.all()
+    }
+
+
+def test_stream_parser_matches_json_load():
+    text = DB_JSON.read_text(encoding='utf-8')
+    assert list(
+        iter_json_array(io.StringIO(text), chunk_size=7)
+    ) == json.loads(text)
+    assert list(iter_json_array(io.StringIO(' [ ] '))) == []
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('[{"a": 1}, {"b"')))
+
+
+def test_stream_parser_reports_broken_json_at_once():
+    text = '[{"a": 1}, {"b" 2}, ' + '{"c": 3}, ' * 1000 + '{"d": 4}]'
+    stream = io.StringIO(text)
+    with pytest.raises(ValueError, match='позиции 16'):
+        list(iter_json_array(stream, chunk_size=64))
+    assert stream.tell() < len(text), (
+        'Убедитесь, что ошибка синтаксиса не дочитывает фикстуру до конца.'
+    )
+    split = '[{"a": "строка, с запятой", "b": true, "c": -1.5e3}]'
+    for chunk_size in range(1, len(split) + 1):
+        assert list(
+            iter_json_array(io.StringIO(split), chunk_size=chunk_size)
+        ) == json.loads(split)
+
+
+def test_load_db_json():
+    loaded = load_fixture(DB_JSON)
+    assert loaded['blog.Post'] == Post.objects.count() == 39
+    assert not Post.objects.filter(excerpt='').exists(), (
+        'Убедитесь, что загрузчик заполняет анонсы постов.'
+    )
+    assert FeedEntry.objects.exists(), (
+        'Убедитесь, что после загрузки пересобрана лента.'
+    )
+    assert Post.objects.get(pk=1).created_at.year == 2022, (
+        'Убедитесь, что загрузчик сохраняет created_at из фикстуры.'
+    )
+
+
+def test_dump_and_bulk_load_round_trip(
+        tmp_path, mixer, user, published_category,
+        many_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    mixer.cycle(5).blend('blog.Comment', post=posts[0], author=user)
+    path = tmp_path / 'dump.json'
+    call_command(
+        'dumpdata', 'auth.user', 'blog', output=str(path),
+        exclude=['blog.feedentry'],
+    )
+    expected = snapshot()
+    feed = set(FeedEntry.objects.values_list('post_id', flat=True))
+    Comment.objects.all().delete()
+    Post.objects.all().delete()
+    get_user_model().objects.all().delete()
+
+    with CaptureQueriesContext(connection) as queries:
+        loaded = load_fixture(path, batch_size=8)
+    inserts = [
+        query for query in queries.captured_queries
+        if query['sql'].startswith('INSERT INTO "blog_post"')
+    ]
+    assert loaded['blog.Post'] == 20
+    assert len(inserts) == 3, (
+        'Убедитесь, что посты вставляются пакетами, а не по одному.'
+    )
+    assert snapshot() == expected, (
+        'Убедитесь, что загрузка сохраняет created_at и счётчики.'
+    )
+    assert set(FeedEntry.objects.values_list('post_id', flat=True)) == feed
+
+
+def test_unknown_fields_need_ignorenonexistent(tmp_path):
+    path = tmp_path / 'extra.json'
+    path.write_text(json.dumps([{
+        'model': 'blog.category', 'pk': 50,
+        'fields': {
+            'title': 'Старая схема', 'description': 'Описание',
+            'slug': 'old-schema', 'is_published': True,
+            'created_at': '2022-01-01T00:00:00Z', 'color': 'red',
+        },
+    }]), encoding='utf-8')
+    with pytest.raises(CommandError, match='color'):
+        call_command('bulk_loaddata', str(path), stdout=io.StringIO())
+    assert not Category.objects.filter(slug='old-schema').exists()
+    call_command(
+        'bulk_loaddata', str(path), ignorenonexistent=True,
+        stdout=io.StringIO(),
+    )
+    assert Category.objects.filter(slug='old-schema').exists(), (
+        'Убедитесь, что с --ignorenonexistent лишние поля пропускаются.'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_load_into_other_database(tmp_path):
+    alias = 'bulkload_target'
+    connections.databases[alias] = {
+        **connections.databases['default'],
+        'NAME': str(tmp_path / 'target.sqlite3'),
+        'TEST': {},
+    }
+    try:
+        call_command('migrate', database=alias, verbosity=0)
+
+        load_fixture(DB_JSON, using=alias)
+        assert Post.objects.using(alias).count() == 39
+        assert not Post.objects.exists()
+        assert FeedEntry.objects.using(alias).exists(), (
+            'Убедитесь, что лента пересобирается в базе using.'
+        )
+        assert not FeedEntry.objects.exists()
+        assert sum(Post.objects.using(alias).values_list(
+            'comment_count', flat=True
+        )) == Comment.objects.using(alias).count(), (
+            'Убедитесь, что счётчики пересчитываются в базе using.'
+        )
+        if use_fts(alias):
+            with connections[alias].cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+                indexed = cursor.fetchone()[0]
+        else:
+            indexed = SearchPosting.objects.using(alias).values(
+                'post'
+            ).distinct().count()
+        assert indexed == 39, (
+            'Убедитесь, что поиск переиндексируется в базе using.'
+        )
+    finally:
+        connections[alias].close()
+        del connections[alias]
+        del connections.databases[alias]
@@ -0,0 +1,72 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_writes(
+        mixer, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend('blog.Comment', post=post)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        'Убедитесь, что счётчик комментариев увеличивается при создании '
+        'комментария.'
+    )
+
+    comments[0].delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        'Убедитесь, что счётчик комментариев уменьшается при удалении '
+        'комментария.'
+    )
+
+    user_client.post(f'/posts/{post.id}/comment/', {'text': 'Текст'})
+    post.refresh_from_db()
+    assert post.comment_count == 3
+
+
+def test_feed_reads_stored_comment_count(
+        mixer, client, post_with_published_location
+):
+    mixer.cycle(2).blend('blog.Comment', post=post_with_published_location)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/')
+    assert 'Комментарии (2)' in response.content.decode()
+    assert not any(
+        'GROUP BY' in query['sql'] for query in queries.captured_queries
+    ), 'Убедитесь, что лента не агрегирует комментарии.'
+
+
+def test_recount_comments_fixes_drift(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend('blog.Comment', post=post)
+    type(post).objects.filter(pk=post.pk).update(comment_count=7)
+
+    call_command('recount_comments')
+
+    post.refresh_from_db()
+    assert post.comment_count == 2
+
+
+def test_post_delete_does_not_touch_each_comment(
+        mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(3).blend('blog.Comment', post=post)
+    with CaptureQueriesContext(connection) as few:
+        post.delete()
+    post = mixer.blend(
+        'blog.Post', author=post.author, category=post.category
+    )
+    mixer.cycle(30).blend('blog.Comment', post=post)
+    with CaptureQueriesContext(connection) as many:
+        post.delete()
+    assert len(many) == len(few), (
+        'Убедитесь, что удаление поста не обрабатывает комментарии '
+        'по одному.'
+    )
+    assert not type(post).comments.field.model.objects.exists()
@@ -0,0 +1,49 @@
+from http import HTTPStatus
+
+import pytest
+
+from blogicum.constants import COMMENTS_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comments_are_served_in_chunks(
+        mixer, client, post_with_published_location
+):
+    post = post_with_published_location
+    total = COMMENTS_PER_PAGE * 2 + 5
+    created = mixer.cycle(total).blend('blog.Comment', post=post)
+
+    response = client.get(f'/posts/{post.id}/')
+    assert f'Комментарии ({total})' in response.content.decode(), (
+        'Убедитесь, что число комментариев берётся из сохранённого счётчика.'
+    )
+    seen = [comment.pk for comment in response.context['comments']]
+    assert len(seen) == COMMENTS_PER_PAGE, (
+        'Убедитесь, что на странице поста выводится только первая порция '
+        'комментариев.'
+    )
+    cursor = response.context['next_cursor']
+    while cursor:
+        response = client.get(
+            f'/posts/{post.id}/comments/', {'after': cursor}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert '<html' not in response.content.decode()
+        seen.extend(comment.pk for comment in response.context['comments'])
+        cursor = response.context['next_cursor']
+
+    expected = sorted(created, key=lambda comment: (comment.created_at,
+                                                    comment.pk))
+    assert seen == [comment.pk for comment in expected]
+
+
+def test_comment_chunks_follow_post_visibility(
+        client, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    url = f'/posts/{post.id}/comments/'
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+    assert user_client.get(url).status_code == HTTPStatus.OK
@@ -0,0 +1,187 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from blog.feed import publish_due
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_validated(client, url, last_modified=True):
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, url
+    assert response.has_header('ETag'), (
+        f'Убедитесь, что страница {url} отдаёт ETag.'
+    )
+    assert response.has_header('Last-Modified') is last_modified, (
+        f'Убедитесь, что страница {url} отдаёт Last-Modified только '
+        'анонимам: он не зависит от того, кто смотрит.'
+    )
+    return response
+
+
+def revalidate(client, url, response, header='ETag'):
+    meta = {
+        'ETag': 'HTTP_IF_NONE_MATCH',
+        'Last-Modified': 'HTTP_IF_MODIFIED_SINCE',
+    }[header]
+    return client.get(url, **{meta: response[header]})
+
+
+@pytest.mark.parametrize('header', ('ETag', 'Last-Modified'))
+def test_unchanged_feed_is_not_rendered(
+        client, django_assert_num_queries, post_with_published_location,
+        header
+):
+    response = get_validated(client, '/')
+    with django_assert_num_queries(0):
+        repeat = revalidate(client, '/', response, header)
+    assert repeat.status_code == HTTPStatus.NOT_MODIFIED, (
+        'Убедитесь, что неизменившаяся лента отдаётся ответом 304.'
+    )
+    assert not repeat.templates and not repeat.content, (
+        'Убедитесь, что ответ 304 отдаётся без отрисовки шаблона.'
+    )
+    assert repeat['ETag'] == response['ETag']
+
+
+def test_new_post_changes_feed_validators(
+        client, mixer, user, published_category, post_with_published_location
+):
+    category_url = f'/category/{published_category.slug}/'
+    feed = get_validated(client, '/')
+    category = get_validated(client, category_url)
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        pub_date=post_with_published_location.pub_date,
+    )
+    for url, response in (('/', feed), (category_url, category)):
+        repeat = revalidate(client, url, response)
+        assert repeat.status_code == HTTPStatus.OK, (
+            f'Убедитесь, что после нового поста {url} отдаётся заново.'
+        )
+        assert repeat['ETag'] != response['ETag']
+
+
+def test_post_detail_validators(
+        client, user_client, mixer, user, post_with_published_location
+):
+    url = f'/posts/{post_with_published_location.pk}/'
+    anonymous = get_validated(client, url)
+    assert revalidate(client, url, anonymous).status_code == (
+        HTTPStatus.NOT_MODIFIED
+    )
+    logged_in = get_validated(user_client, url, last_modified=False)
+    assert logged_in['ETag'] != anonymous['ETag'], (
+        'Убедитесь, что ETag страницы зависит от пользователя.'
+    )
+    mixer.blend(
+        'blog.Comment', post=post_with_published_location, author=user
+    )
+    assert revalidate(client, url, anonymous).status_code == HTTPStatus.OK, (
+        'Убедитесь, что новый комментарий меняет ETag страницы поста.'
+    )
+
+
+def test_own_profile_sees_new_draft(
+        user_client, mixer, user, published_category
+):
+    url = f'/profile/{user.username}/'
+    response = get_validated(user_client, url, last_modified=False)
+    assert revalidate(user_client, url, response).status_code == (
+        HTTPStatus.NOT_MODIFIED
+    )
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=False,
+    )
+    repeat = revalidate(user_client, url, response)
+    assert repeat.status_code == HTTPStatus.OK, (
+        'Убедитесь, что новый черновик меняет ETag профиля автора.'
+    )
+
+
+def test_anonymous_copy_is_not_revalidated_after_login(
+        client, user, post_with_published_location
+):
+    url = f'/posts/{post_with_published_location.pk}/'
+    anonymous = get_validated(client, url)
+    client.force_login(user)
+    repeat = revalidate(client, url, anonymous, 'Last-Modified')
+    assert repeat.status_code == HTTPStatus.OK, (
+        'Убедитесь, что после входа копия анонима не подтверждается '
+        'по If-Modified-Since.'
+    )
+
+
+@pytest.fixture
+def local_cache(settings):
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }}
+
+
+def test_local_cache_validators_come_from_db(
+        local_cache, client, post_with_published_location
+):
+    response = get_validated(client, '/')
+    assert revalidate(client, '/', response).status_code == (
+        HTTPStatus.NOT_MODIFIED
+    )
+    post = post_with_published_location
+    # Правка из другого процесса: сигналы и сброс тегов здесь не видны.
+    type(post).objects.filter(pk=post.pk).update(
+        title='Из другого процесса', updated_at=timezone.now()
+    )
+    assert revalidate(client, '/', response).status_code == HTTPStatus.OK, (
+        'Убедитесь, что на кеше одного процесса валидаторы берутся '
+        'из MAX(updated_at) в БД.'
+    )
+
+
+def test_local_cache_sees_scheduled_publication(
+        local_cache, client, mixer, user, published_category,
+        post_with_published_location
+):
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(days=1),
+    )
+    feed = get_validated(client, '/')
+    publish_due(timezone.now() + timedelta(days=2))
+    assert revalidate(client, '/', feed).status_code == HTTPStatus.OK, (
+        'Убедитесь, что после выпуска отложенного поста лента на кеше '
+        'одного процесса отдаётся заново, а не ответом 304.'
+    )
+
+
+def test_local_cache_sees_author_changes(
+        local_cache, client, user, post_with_published_location
+):
+    url = f'/profile/{user.username}/'
+    response = get_validated(client, url)
+    # Правка из другого процесса: сигналы и сброс тегов здесь не видны.
+    type(user).objects.filter(pk=user.pk).update(first_name='Новое имя')
+    assert revalidate(client, url, response).status_code == HTTPStatus.OK, (
+        'Убедитесь, что на кеше одного процесса правка автора меняет '
+        'ETag его страницы.'
+    )
+
+
+def test_updated_at_tracks_changes(
+        mixer, user, post_with_published_location
+):
+    post = post_with_published_location
+    stamp = post.updated_at
+    comment = mixer.blend('blog.Comment', post=post, author=user)
+    post.refresh_from_db()
+    assert post.updated_at > stamp, (
+        'Убедитесь, что новый комментарий обновляет updated_at поста.'
+    )
+    stamp = post.updated_at
+    comment.text = 'Исправленный текст'
+    comment.save()
+    post.refresh_from_db()
+    assert post.updated_at > stamp
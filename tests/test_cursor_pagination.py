@@ -0,0 +1,61 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@override_settings(BLOG_CURSOR_PAGINATION=True)
+@pytest.mark.parametrize('url', ('/', '/category/{slug}/', '/profile/{user}/'))
+def test_cursor_pages_cover_feed(
+        client, user, published_category, many_posts_with_published_locations,
+        url
+):
+    url = url.format(slug=published_category.slug, user=user.username)
+    expected = sorted(
+        many_posts_with_published_locations,
+        key=lambda post: (post.pub_date, post.pk),
+        reverse=True,
+    )
+    seen = []
+    response = client.get(url)
+    while True:
+        assert response.status_code == HTTPStatus.OK
+        page_obj = response.context['page_obj']
+        assert len(page_obj) <= N_PER_PAGE
+        seen.extend(post.pk for post in page_obj)
+        if not page_obj.has_next():
+            break
+        assert f'?after={page_obj.next_cursor}' in response.content.decode()
+        response = client.get(url, {'after': page_obj.next_cursor})
+    assert seen == [post.pk for post in expected], (
+        'Убедитесь, что курсорная пагинация выдаёт все публикации '
+        'по одному разу, «от новых к старым».'
+    )
+
+    response = client.get(url, {'before': page_obj.previous_cursor})
+    assert [post.pk for post in response.context['page_obj']] == [
+        post.pk for post in expected[:N_PER_PAGE]
+    ]
+
+
+@override_settings(BLOG_CURSOR_PAGINATION=True)
+def test_cursor_page_skips_count(client, many_posts_with_published_locations):
+    with CaptureQueriesContext(connection) as queries:
+        client.get('/')
+    assert not any(
+        'COUNT(*)' in query['sql']
+        for query in queries.captured_queries
+    ), 'Убедитесь, что курсорная пагинация не выполняет COUNT(*).'
+
+
+def test_broken_cursor_falls_back_to_first_page(
+        client, many_posts_with_published_locations
+):
+    response = client.get('/', {'after': '!!!'})
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.context['page_obj']) == N_PER_PAGE
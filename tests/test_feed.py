@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.feed import feed_changed, publish_due
+from blog.models import FeedEntry
+
+pytestmark = [pytest.mark.django_db]
+
+
+def feed_ids():
+    return set(FeedEntry.objects.values_list('post_id', flat=True))
+
+
+def test_feed_follows_post_saves(
+        mixer, user, published_category, post_with_published_location
+):
+    post = post_with_published_location
+    assert feed_ids() == {post.pk}
+
+    post.is_published = False
+    post.save()
+    assert feed_ids() == set(), (
+        'Убедитесь, что снятый с публикации пост удаляется из ленты.'
+    )
+
+    post.is_published = True
+    post.save()
+    mixer.blend('blog.Comment', post=post)
+    entry = FeedEntry.objects.get(post=post)
+    assert entry.category_id == published_category.pk
+    assert entry.author_id == user.pk
+
+
+def test_category_toggle_is_one_bulk_query(
+        published_category, many_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    assert feed_ids() == {post.pk for post in posts}
+
+    published_category.is_published = False
+    with CaptureQueriesContext(connection) as queries:
+        published_category.save()
+    deletes = [
+        query for query in queries.captured_queries
+        if query['sql'].startswith('DELETE')
+    ]
+    assert len(deletes) == 1, (
+        'Убедитесь, что снятие категории с публикации убирает её посты '
+        'из ленты одним запросом.'
+    )
+    assert feed_ids() == set()
+
+    published_category.is_published = True
+    published_category.save()
+    assert feed_ids() == {post.pk for post in posts}
+
+
+def test_rebuild_feed(published_category, many_posts_with_published_locations):
+    FeedEntry.objects.all().delete()
+    call_command('rebuild_feed')
+    assert feed_ids() == {
+        post.pk for post in many_posts_with_published_locations
+    }
+
+
+def test_scheduler_publishes_due_posts(
+        mixer, client, user, published_category
+):
+    now = timezone.now()
+    soon, later = mixer.cycle(2).blend(
+        'blog.Post',
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=(now + timedelta(days=days) for days in (1, 3)),
+    )
+    assert FeedEntry.objects.filter(is_live=True).count() == 0
+    assert publish_due() == 0
+
+    events = []
+
+    def listener(sender, post_ids, **kwargs):
+        events.append(post_ids)
+
+    feed_changed.connect(listener)
+    try:
+        published = publish_due(now + timedelta(days=2))
+    finally:
+        feed_changed.disconnect(listener)
+
+    assert published == 1
+    assert events == [{soon.pk}], (
+        'Убедитесь, что планировщик рассылает событие об изменении ленты.'
+    )
+    assert [
+        post.pk for post in client.get('/').context['page_obj']
+    ] == [soon.pk]
+
+
+def test_feed_reads_excerpt_instead_of_text(
+        client, post_with_published_location
+):
+    post = post_with_published_location
+    post.text = ' '.join(f'слово{i}' for i in range(5000))
+    post.save()
+    assert post.excerpt == ' '.join(f'слово{i}' for i in range(10)) + ' …'
+
+    with CaptureQueriesContext(connection) as queries:
+        content = client.get('/').content.decode()
+    assert post.excerpt in content
+    assert not any(
+        '"blog_post"."text"' in query['sql']
+        for query in queries.captured_queries
+    ), 'Убедитесь, что лента не загружает полный текст постов.'
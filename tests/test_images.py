@@ -0,0 +1,201 @@
+from io import BytesIO
+
+import pytest
+from bs4 import BeautifulSoup
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import ExifTags, Image
+
+from blog.forms import PostForm
+from blog.imagejobs import make_pool, run_jobs
+from blog.images import decode
+from blog.models import ImageJob, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+def jpeg(size, name='photo.jpg'):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'teal').save(buffer, 'JPEG')
+    return SimpleUploadedFile(
+        name, buffer.getvalue(), content_type='image/jpeg'
+    )
+
+
+@pytest.fixture
+def pool(media_root):
+    # Процесс пула наследует MEDIA_ROOT текущего теста.
+    with make_pool(1) as pool:
+        yield pool
+
+
+def post_form(user, category, image, instance=None):
+    form = PostForm(
+        data={
+            'title': 'Фото', 'text': 'Текст', 'category': category.pk,
+            'pub_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+            'is_published': True,
+        },
+        files={'image': image},
+        instance=instance or Post(author=user),
+    )
+    assert form.is_valid(), form.errors
+    return form
+
+
+def save_post(user, category, image, instance=None):
+    return post_form(user, category, image, instance).save()
+
+
+def process(pool, post):
+    run_jobs(pool, 10)
+    post.refresh_from_db()
+    return post
+
+
+def test_upload_is_processed_out_of_request(
+        client, pool, user, published_category
+):
+    post = save_post(user, published_category, jpeg((2000, 1500)))
+    assert post.image_processing and post.image_variants == {}
+    assert ImageJob.objects.get(post=post).status == ImageJob.PENDING, (
+        'Убедитесь, что форма ставит новое фото в очередь обработки.'
+    )
+    assert 'image-processing.svg' in client.get('/').content.decode(), (
+        'Убедитесь, что до обработки фото пост показывает заглушку.'
+    )
+
+    post = process(pool, post)
+    assert not post.image_processing
+    assert ImageJob.objects.get(post=post).status == ImageJob.DONE
+    variants = post.image_variants
+    assert (variants['width'], variants['height']) == (2000, 1500)
+    for kind in ('jpeg', 'webp'):
+        assert set(variants[kind]) == {'480', '960', '1600'}, (
+            'Убедитесь, что форма поста сохраняет копии фото нужной ширины.'
+        )
+        for width, name in variants[kind].items():
+            with default_storage.open(name) as file:
+                assert Image.open(file).width == int(width)
+
+    card = BeautifulSoup(client.get('/').content, 'html.parser').find(
+        'img', src=post.image_card_url
+    )
+    assert card is not None and '_480' in card['src'], (
+        'Убедитесь, что карточка поста выводит маленькую копию фото.'
+    )
+    assert f'{post.image.url} 2000w' in card['srcset']
+    detail = client.get(f'/posts/{post.pk}/').content.decode()
+    assert post.image_detail_url in detail and '_960' in detail
+
+
+def test_small_image_has_no_variants(pool, user, published_category):
+    post = process(
+        pool, save_post(user, published_category, jpeg((100, 100)))
+    )
+    assert post.image_variants['jpeg'] == {}
+    assert post.image_card_url == post.image.url
+    assert post.image_srcset == ''
+
+
+def test_replaced_image_drops_old_variants(pool, user, published_category):
+    post = process(
+        pool, save_post(user, published_category, jpeg((1000, 800)))
+    )
+    old = post.image_variants['jpeg']['960']
+    post = save_post(
+        user, published_category, jpeg((600, 600), 'new.jpg'), post
+    )
+    assert not default_storage.exists(old)
+    assert set(process(pool, post).image_variants['jpeg']) == {'480'}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rolled_back_save_keeps_old_variants(user, published_category):
+    post = save_post(user, published_category, jpeg((100, 100)))
+    old = default_storage.save('media/variants/old_480.jpg', ContentFile(b''))
+    Post.objects.filter(pk=post.pk).update(
+        image_variants={'jpeg': {'480': old}}
+    )
+    post.refresh_from_db()
+    form = post_form(
+        user, published_category, jpeg((600, 600), 'new.jpg'), post
+    )
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            form.save()
+            raise RuntimeError('Откат, как у пачки очереди записи')
+    assert default_storage.exists(old), (
+        'Убедитесь, что старые копии фото удаляются только после коммита.'
+    )
+    form.save()
+    assert not default_storage.exists(old), (
+        'Убедитесь, что повтор сохранения после отката удаляет старые копии.'
+    )
+
+
+def test_stale_job_result_is_discarded(pool, user, published_category):
+    post = save_post(user, published_category, jpeg((1000, 800)))
+    Post.objects.filter(pk=post.pk).update(image='media/other.jpg')
+    post = process(pool, post)
+    assert post.image_variants == {}, (
+        'Убедитесь, что копии уже заменённого фото не попадают в пост.'
+    )
+    assert not any(
+        default_storage.listdir('media/variants')[1]
+    )
+
+
+def test_broken_image_fails_after_retries(
+        settings, pool, user, published_category
+):
+    settings.BLOG_IMAGE_JOB_ATTEMPTS = 2
+    post = save_post(user, published_category, jpeg((1000, 800)))
+    default_storage.delete(post.image.name)
+    process(pool, post)
+    assert ImageJob.objects.get(post=post).status == ImageJob.PENDING
+    post = process(pool, post)
+    job = ImageJob.objects.get(post=post)
+    assert (job.status, job.attempts) == (ImageJob.FAILED, 2)
+    assert not post.image_processing, (
+        'Убедитесь, что после отказа пост показывает исходное фото.'
+    )
+
+
+def test_decode_uses_draft_for_large_jpeg():
+    image, size = decode(jpeg((4000, 3000)), 960)
+    assert size == (4000, 3000)
+    assert 960 <= image.width < 4000, (
+        'Убедитесь, что большой JPEG уменьшается ещё при декодировании.'
+    )
+
+
+def test_decode_respects_exif_rotation():
+    buffer = BytesIO()
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = 6
+    Image.new('RGB', (4000, 3000), 'teal').save(buffer, 'JPEG', exif=exif)
+    image, size = decode(BytesIO(buffer.getvalue()), 1600)
+    assert size == (3000, 4000)
+    assert image.height > image.width >= 1600, (
+        'Убедитесь, что черновик повёрнутого снимка не уже нужной ширины: '
+        'иначе копии получатся растянутыми.'
+    )
+
+
+def test_transparent_image_gets_white_background():
+    buffer = BytesIO()
+    Image.new('RGBA', (100, 100), (255, 0, 0, 0)).save(buffer, 'PNG')
+    image, _ = decode(BytesIO(buffer.getvalue()), 960)
+    assert image.mode == 'RGB'
+    assert image.getpixel((50, 50)) == (255, 255, 255), (
+        'Убедитесь, что прозрачные области становятся белыми, а не чёрными.'
+    )
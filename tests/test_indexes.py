@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+
+from blog.models import FeedEntry
+from blog.service import get_published_posts
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='План запроса проверяется в формате SQLite.',
+    ),
+]
+
+
+@pytest.fixture
+def feed_querysets(
+        user, published_category, many_posts_with_published_locations
+):
+    return {
+        'index': get_published_posts(),
+        'category': get_published_posts(category=published_category),
+        'profile': get_published_posts(author=user),
+        'own_profile': get_published_posts(on_filter=False, author=user),
+    }
+
+
+@pytest.mark.parametrize(
+    ('feed', 'index_name'),
+    (
+        ('index', 'feed_live_pub_date_idx'),
+        ('category', 'feed_live_category_idx'),
+        ('profile', 'feed_live_author_idx'),
+        ('own_profile', 'post_author_feed_idx'),
+    ),
+)
+def test_feed_is_read_in_index_order(feed_querysets, feed, index_name):
+    plan = feed_querysets[feed][:10].explain()
+    assert index_name in plan, (
+        f'Убедитесь, что лента `{feed}` читается по индексу `{index_name}`.'
+    )
+    assert 'TEMP B-TREE' not in plan, (
+        f'Убедитесь, что лента `{feed}` не сортирует всю таблицу постов.'
+    )
+
+
+def test_comments_are_read_in_index_order(post_with_published_location):
+    plan = post_with_published_location.comments.all().explain()
+    assert 'comment_post_created_idx' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_fallback_validators_are_read_from_indexes():
+    # Валидаторы страниц на кеше одного процесса: см. blog.cache.db_changes.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'EXPLAIN QUERY PLAN SELECT MAX(updated_at) FROM blog_post'
+        )
+        plan = ' '.join(str(row) for row in cursor.fetchall())
+    assert 'post_updated_at_idx' in plan, (
+        'Убедитесь, что время последней правки постов берётся по индексу.'
+    )
+    live = FeedEntry.objects.filter(is_live=True).values('pub_date')
+    assert 'feed_live_pub_date_idx' in live.order_by('-pub_date').explain()
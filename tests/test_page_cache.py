@@ -0,0 +1,236 @@
+import os
+import subprocess
+import sys
+from unittest import mock
+
+import pytest
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.signals import template_rendered
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_urls(user, published_category):
+    return (
+        '/',
+        f'/category/{published_category.slug}/',
+        f'/profile/{user.username}/',
+    )
+
+
+def test_anonymous_pages_are_cached(
+        client, feed_urls, post_with_published_location
+):
+    for url in feed_urls:
+        first = client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            second = client.get(url)
+        assert second.content == first.content
+        assert len(queries.captured_queries) == 0, (
+            f'Убедитесь, что страница {url} для анонимов отдаётся из кеша.'
+        )
+
+
+def test_logged_in_pages_bypass_cache(
+        user_client, feed_urls, post_with_published_location
+):
+    for url in feed_urls:
+        user_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            user_client.get(url)
+        assert queries.captured_queries
+
+
+@pytest.mark.parametrize('change', ('unpublish_post', 'unpublish_category'))
+def test_unpublish_invalidates_cached_pages(
+        client, feed_urls, post_with_published_location, change
+):
+    post = post_with_published_location
+    for url in feed_urls:
+        assert post.title in client.get(url).content.decode()
+
+    target = post if change == 'unpublish_post' else post.category
+    target.is_published = False
+    target.save()
+
+    for url in feed_urls:
+        response = client.get(url)
+        assert post.title not in response.content.decode(), (
+            f'Убедитесь, что после снятия с публикации страница {url} '
+            'не отдаётся из устаревшего кеша.'
+        )
+
+
+def test_new_comment_invalidates_cached_pages(
+        mixer, client, feed_urls, post_with_published_location
+):
+    for url in feed_urls:
+        client.get(url)
+    mixer.blend('blog.Comment', post=post_with_published_location)
+    for url in feed_urls:
+        assert 'Комментарии (1)' in client.get(url).content.decode()
+
+
+def invalidate_in_other_process(*tags):
+    code = (
+        'import django; django.setup(); '
+        'from blog.cache import invalidate_tags; '
+        f'invalidate_tags(*{tags!r})'
+    )
+    subprocess.run(
+        [sys.executable, '-c', code], check=True,
+        cwd=django_settings.BASE_DIR,
+        env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'blogicum.settings'},
+    )
+
+
+def test_invalidation_from_other_process(
+        client, post_with_published_location
+):
+    post = post_with_published_location
+    assert post.title in client.get('/').content.decode()
+    # Правка в обход сигналов: сбросить кеш может только другой процесс.
+    type(post).objects.filter(pk=post.pk).update(title='Из планировщика')
+    assert post.title in client.get('/').content.decode()
+
+    invalidate_in_other_process('feed')
+    assert 'Из планировщика' in client.get('/').content.decode(), (
+        'Убедитесь, что сброс кеша из другого процесса виден веб-процессу.'
+    )
+
+
+def test_page_cache_refused_on_local_cache(
+        settings, client, post_with_published_location
+):
+    from blog.checks import check_shared_cache
+
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }}
+    assert [error.id for error in check_shared_cache(None)] == [
+        'blog.E001'
+    ], 'Убедитесь, что кеш страниц на LocMemCache не включается.'
+    client.get('/')
+    post = post_with_published_location
+    type(post).objects.filter(pk=post.pk).update(title='Без кеша')
+    assert 'Без кеша' in client.get('/').content.decode()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_tags_are_reset_after_commit(post_with_published_location):
+    from django.db import transaction
+
+    from blog.cache import get_tag_versions
+
+    post = post_with_published_location
+    before = get_tag_versions(['feed'])
+    with transaction.atomic():
+        post.title = 'Ещё не закоммичено'
+        post.save()
+        assert get_tag_versions(['feed']) == before, (
+            'Убедитесь, что кеш сбрасывается только после коммита.'
+        )
+    assert get_tag_versions(['feed']) != before
+
+
+def test_tag_version_is_never_reused():
+    from blog.cache import TAG_KEY, get_tag_versions, invalidate_tags
+
+    old = get_tag_versions(['feed'])['feed']
+    invalidate_tags('feed')
+    # Тег вытеснен, и его заново завели с версией, предшествующей новой.
+    cache.set(TAG_KEY.format('feed'), old - 1, None)
+    invalidate_tags('feed')
+    assert get_tag_versions(['feed'])['feed'] not in (old - 1, old, old + 1), (
+        'Убедитесь, что сброс тега выдаёт новую версию, а не прибавляет '
+        'единицу к прежней.'
+    )
+
+
+def test_user_saves_reset_only_their_pages(mixer, user):
+    from blog.cache import get_tag_versions
+
+    tags = ['global', f'author:{user.username}']
+    before = get_tag_versions(tags)
+    mixer.blend(type(user))
+    assert get_tag_versions(tags) == before, (
+        'Убедитесь, что регистрация пользователя не сбрасывает кеш.'
+    )
+
+    user.first_name = 'Новое имя'
+    user.save()
+    after = get_tag_versions(tags)
+    assert after['global'] == before['global'], (
+        'Убедитесь, что правка профиля сбрасывает только страницы автора.'
+    )
+    assert after[tags[1]] != before[tags[1]]
+
+    user.username = 'renamed'
+    user.save()
+    assert get_tag_versions(['global'])['global'] != before['global']
+
+
+def test_post_cards_come_from_one_cache_read(
+        user_client, many_posts_with_published_locations
+):
+    rendered = []
+
+    def on_render(sender, template, **kwargs):
+        rendered.append(template.name)
+
+    user_client.get('/')
+    template_rendered.connect(on_render)
+    try:
+        with mock.patch.object(
+            cache, 'get_many', wraps=cache.get_many
+        ) as get_many:
+            response = user_client.get('/')
+    finally:
+        template_rendered.disconnect(on_render)
+    assert 'includes/post_card.html' not in rendered, (
+        'Убедитесь, что карточки постов берутся из кеша фрагментов.'
+    )
+    card_reads = [
+        call for call in get_many.call_args_list
+        if all(key.startswith('blog:card:') for key in call.args[0])
+    ]
+    assert len(card_reads) == 1
+    assert response.content.decode().count('<article') == 10
+
+    post = response.context['page_obj'][0]
+    post.title = 'Новый заголовок карточки'
+    post.save()
+    assert post.title in user_client.get('/').content.decode()
+
+
+def test_post_detail_is_one_lookup_then_cached(
+        client, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    url = f'/posts/{post.id}/'
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+    post_queries = [
+        query for query in queries.captured_queries
+        if 'FROM "blog_post"' in query['sql']
+    ]
+    assert len(post_queries) == 1, (
+        'Убедитесь, что пост и его видимость выбираются одним запросом.'
+    )
+    assert ' OR ' not in post_queries[0]['sql']
+
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+    assert not any(
+        'FROM "blog_post"' in query['sql']
+        for query in queries.captured_queries
+    ), 'Убедитесь, что пост для страницы публикации берётся из кеша.'
+
+    post.is_published = False
+    post.save()
+    assert client.get(url).status_code == 404
+    assert user_client.get(url).status_code == 200
@@ -0,0 +1,58 @@
+import logging
+
+import pytest
+from django.test.utils import override_settings
+
+from blogicum.querycount import assert_query_budget, fingerprint
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def urls(mixer, user, published_category, many_posts_with_published_locations):
+    post = many_posts_with_published_locations[0]
+    comments = mixer.cycle(30).blend('blog.Comment', post=post, author=user)
+    return (
+        '/',
+        f'/category/{published_category.slug}/',
+        f'/profile/{user.username}/',
+        f'/posts/{post.id}/',
+        f'/posts/{post.id}/comments/',
+        f'/search/?q={post.title.split()[0]}',
+        '/posts/create/',
+        f'/posts/{post.id}/edit/',
+        f'/posts/{post.id}/delete/',
+        f'/posts/{post.id}/comment/',
+        f'/posts/{post.id}/edit_comment/{comments[0].id}/',
+        f'/posts/{post.id}/delete_comment/{comments[0].id}/',
+        '/edit_profile/',
+        '/pages/about/',
+        '/pages/rules/',
+    )
+
+
+def test_views_stay_within_query_budgets(user_client, urls):
+    for url in urls:
+        response = assert_query_budget(user_client, url)
+        assert int(response['X-DB-Query-Count']) >= 0
+        assert float(response['X-DB-Time']) >= 0
+
+
+def test_fingerprint_ignores_literals():
+    assert fingerprint(
+        "SELECT * FROM t WHERE id = 15 AND name = 'a''b' AND x IN (1, 2, 3)"
+    ) == fingerprint(
+        "SELECT * FROM t WHERE id = 7 AND name = 'c' AND x IN (4)"
+    )
+
+
+def test_repeated_queries_are_reported(client, urls, caplog):
+    with override_settings(QUERY_REPEAT_THRESHOLD=0):
+        with caplog.at_level(logging.WARNING, 'blogicum.querycount'):
+            client.get('/')
+    assert any('N+1' in record.getMessage() for record in caplog.records)
+
+
+@override_settings(QUERY_INSTRUMENTATION=False)
+def test_headers_are_off_in_production(client):
+    assert 'X-DB-Query-Count' not in client.get('/pages/about/')
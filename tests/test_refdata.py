@@ -0,0 +1,73 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_feed_skips_category_and_location_joins(
+        user_client, published_category, many_posts_with_published_locations
+):
+    url = f'/category/{published_category.slug}/'
+    user_client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get(url)
+    sql = [query['sql'] for query in queries.captured_queries]
+    assert not any(
+        'FROM "blog_category"' in query or 'FROM "blog_location"' in query
+        for query in sql
+    ), 'Убедитесь, что категории и места берутся из процессного кеша.'
+    assert not any('JOIN "blog_category"' in query for query in sql)
+    assert not any('JOIN "blog_location"' in query for query in sql)
+    content = response.content.decode()
+    assert published_category.title in content
+    post = response.context['page_obj'][0]
+    assert post.location.name in content
+
+
+def test_admin_edit_is_picked_up(
+        user_client, published_category, post_with_published_location
+):
+    url = f'/category/{published_category.slug}/'
+    user_client.get(url)
+    published_category.title = 'Новое название'
+    published_category.save()
+    assert 'Новое название' in user_client.get(url).content.decode()
+
+    location = post_with_published_location.location
+    location.is_published = False
+    location.save()
+    assert location.name not in user_client.get(url).content.decode()
+
+
+def test_edit_from_other_process_is_picked_up(
+        user_client, published_category, post_with_published_location
+):
+    from test_page_cache import invalidate_in_other_process
+
+    url = f'/category/{published_category.slug}/'
+    user_client.get(url)
+    type(published_category).objects.filter(
+        pk=published_category.pk
+    ).update(title='Переименована в другом процессе')
+    invalidate_in_other_process('refdata')
+    assert 'Переименована в другом процессе' in user_client.get(
+        url
+    ).content.decode(), (
+        'Убедитесь, что версия refdata читается из общего кеша.'
+    )
+
+
+def test_refdata_entries_expire(
+        settings, user_client, published_category,
+        post_with_published_location
+):
+    settings.BLOG_REFDATA_MAX_AGE = 0
+    url = f'/category/{published_category.slug}/'
+    user_client.get(url)
+    type(published_category).objects.filter(
+        pk=published_category.pk
+    ).update(title='Правка мимо сигналов')
+    assert 'Правка мимо сигналов' in user_client.get(url).content.decode(), (
+        'Убедитесь, что записи LRU справочников устаревают.'
+    )
@@ -0,0 +1,111 @@
+import asyncio
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connections
+from django.http import HttpResponse
+from django.test import Client
+
+from blog.models import Post
+from blog.routers import (
+    PRIMARY_UNTIL, ReplicaRouter, primary_after_write_middleware,
+    replica_reads_allowed
+)
+
+REPLICA = 'replica_test'
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    """Вторая SQLite-база в файле; данные в неё попадают sync_replica."""
+    connections.databases[REPLICA] = {
+        **connections.databases['default'],
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+        'TEST': {},
+    }
+    settings.BLOG_REPLICA_DATABASES = [REPLICA]
+    yield REPLICA
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.databases[REPLICA]
+
+
+def sync():
+    call_command('sync_replica', stdout=StringIO())
+
+
+def test_router_sends_only_marked_reads_to_replica(settings):
+    settings.BLOG_REPLICA_DATABASES = ['replica_1']
+    router = ReplicaRouter()
+    assert router.db_for_read(Post) == 'default'
+    token = replica_reads_allowed.set(True)
+    try:
+        assert router.db_for_read(Post) == 'replica_1'
+        assert router.db_for_write(Post) == 'default'
+        assert router.db_for_read(Session) == 'default', (
+            'Убедитесь, что сессии всегда читаются с основной БД.'
+        )
+    finally:
+        replica_reads_allowed.reset(token)
+    assert not router.allow_migrate('replica_1', 'blog')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_reads_use_replica_until_own_write(
+        replica, user, published_category, post_with_published_location
+):
+    sync()
+    post = post_with_published_location
+    fresh = Post.objects.create(
+        title='Свежий', text='Текст', author=user,
+        category=published_category, pub_date=post.pub_date,
+    )
+    anonymous, author = Client(), Client()
+    author.force_login(user)
+
+    response = anonymous.get(f'/posts/{fresh.pk}/')
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        'Убедитесь, что публикации читаются с реплики.'
+    )
+    assert anonymous.get(f'/posts/{post.pk}/').status_code == HTTPStatus.OK
+
+    response = author.post(
+        f'/posts/{post.pk}/comment/', {'text': 'Мой комментарий'}
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    assert PRIMARY_UNTIL in author.session
+    response = author.get(f'/posts/{post.pk}/')
+    assert 'Мой комментарий' in response.content.decode(), (
+        'Убедитесь, что после записи автор читает с основной БД.'
+    )
+    assert author.get(f'/posts/{fresh.pk}/').status_code == HTTPStatus.OK
+
+    sync()
+    response = anonymous.get(f'/posts/{fresh.pk}/')
+    assert response.status_code == HTTPStatus.OK, (
+        'Убедитесь, что sync_replica переносит данные на реплику.'
+    )
+
+
+@pytest.mark.django_db
+def test_primary_after_write_middleware_stays_async(settings, rf, user):
+    settings.BLOG_REPLICA_DATABASES = ['replica_1']
+
+    async def get_response(request):
+        return HttpResponse()
+
+    middleware = primary_after_write_middleware(get_response)
+    assert asyncio.iscoroutinefunction(middleware), (
+        'Убедитесь, что primary_after_write_middleware не переводит '
+        'асинхронную цепочку в поток.'
+    )
+    for method, sticks in (('get', False), ('post', True)):
+        request = getattr(rf, method)('/')
+        request.session, request.user = SessionStore(), user
+        async_to_sync(middleware)(request)
+        assert (PRIMARY_UNTIL in request.session) is sticks, method
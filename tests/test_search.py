@@ -0,0 +1,135 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from blog.search import (
+    decode_rank_cursor, encode_rank_cursor, search_posts, tokenize, use_fts
+)
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(params=('auto', 'python'))
+def backend(request, settings):
+    settings.BLOG_SEARCH_BACKEND = request.param
+    return request.param
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make_post(title, text, **kwargs):
+        kwargs.setdefault('pub_date', timezone.now() - timedelta(hours=1))
+        return mixer.blend(
+            'blog.Post', title=title, text=text, author=user,
+            category=kwargs.pop('category', published_category), **kwargs
+        )
+    return make_post
+
+
+def found(query, **kwargs):
+    return [post.pk for post in search_posts(query, **kwargs)]
+
+
+def test_tokenize_folds_case_and_diacritics():
+    assert tokenize('Ёлка, ЁЖИК и café_au-lait') == [
+        'елка', 'ежик', 'и', 'cafe', 'au', 'lait'
+    ]
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='FTS5 есть только в SQLite.'
+)
+def test_auto_backend_uses_fts5(settings):
+    settings.BLOG_SEARCH_BACKEND = 'auto'
+    assert use_fts(), 'Убедитесь, что при наличии FTS5 поиск идёт через неё.'
+
+
+def test_search_ranks_title_matches_first(backend, make_post):
+    in_text = make_post('Заметки', 'Сегодня пекли пироги с вишней.')
+    in_title = make_post('Пироги', 'Рецепт на выходные.')
+    make_post('Другое', 'Совсем не о выпечке.')
+    assert found('пироги') == [in_title.pk, in_text.pk], (
+        'Убедитесь, что совпадение в заголовке ранжируется выше.'
+    )
+    assert found('ПИРОГИ вишней') == [in_text.pk], (
+        'Убедитесь, что ищутся посты, где есть все слова запроса.'
+    )
+    assert found('   ') == []
+
+
+def test_search_respects_visibility(backend, make_post, mixer):
+    make_post('Черновик', 'Секретный текст', is_published=False)
+    make_post(
+        'Будущее', 'Секретный текст',
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    make_post(
+        'Скрытая категория', 'Секретный текст',
+        category=mixer.blend('blog.Category', is_published=False),
+    )
+    visible = make_post('Открытый', 'Секретный текст')
+    assert found('секретный') == [visible.pk], (
+        'Убедитесь, что поиск показывает только опубликованные посты.'
+    )
+
+
+def test_search_folds_yo(backend, make_post):
+    post = make_post('Лёд тронулся', 'Весна.')
+    assert found('ЛЕД') == found('лёд') == [post.pk], (
+        'Убедитесь, что «ё» и «е» в поиске не различаются.'
+    )
+
+
+def test_index_follows_saves_and_deletes(backend, make_post):
+    post = make_post('Заголовок', 'Старый текст')
+    post.text = 'Новый текст'
+    post.save()
+    assert found('старый') == []
+    assert found('новый') == [post.pk], (
+        'Убедитесь, что индекс обновляется при сохранении поста.'
+    )
+    post.delete()
+    assert found('новый') == [], (
+        'Убедитесь, что удалённый пост пропадает из поиска.'
+    )
+
+
+def test_rebuild_index(backend, make_post):
+    post = make_post('Заголовок', 'Текст про кошек')
+    call_command('rebuild_search', stdout=StringIO())
+    assert found('кошек') == [post.pk]
+
+
+def test_search_cursor_pagination(backend, make_post):
+    posts = [make_post(f'Пост {i}', 'общее слово') for i in range(15)]
+    first = search_posts('общее', total=10)
+    assert len(first) == 10 and first.has_next()
+    second = search_posts('общее', first.next_cursor, total=10)
+    assert len(second) == 5 and not second.has_next()
+    assert second.has_previous()
+    seen = [post.pk for post in (*first, *second)]
+    assert sorted(seen) == sorted(post.pk for post in posts), (
+        'Убедитесь, что страницы выдачи не теряют и не повторяют посты.'
+    )
+
+
+def test_rank_cursor_round_trip():
+    rank = -1.2345678901234567
+    assert decode_rank_cursor(encode_rank_cursor(rank, 7)) == (rank, 7)
+    assert decode_rank_cursor('испорчен') is None
+    assert decode_rank_cursor(encode_rank_cursor(float('nan'), 1)) is None
+
+
+def test_search_view(client, make_post):
+    post = make_post('Путешествие на Байкал', 'Лёд и ветер.')
+    response = client.get('/search/', {'q': 'байкал'})
+    assert response.status_code == HTTPStatus.OK
+    assert [item.pk for item in response.context['page_obj']] == [post.pk]
+    assert 'Путешествие на Байкал' in response.content.decode()
+    response = client.get('/search/', {'q': 'нигде'})
+    assert 'ничего не найдено' in response.content.decode()
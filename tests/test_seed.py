@@ -0,0 +1,69 @@
+import random
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count
+
+from blog.models import Category, Comment, FeedEntry, Post
+from blog.seeding import bulk_insert, choice_stream, seed
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_seed_command_scale_and_skew():
+    call_command(
+        'seed', users=10, categories=10, locations=5, posts=100,
+        comments=2000, scale=2, unpublished_categories=0.5,
+        future_posts=0.3, batch_size=64, stdout=StringIO(),
+    )
+    assert Post.objects.count() == 200
+    assert Comment.objects.count() == 4000
+    assert Category.objects.filter(is_published=False).exists(), (
+        'Убедитесь, что часть категорий создаётся скрытой.'
+    )
+    assert FeedEntry.objects.filter(is_live=False).exists(), (
+        'Убедитесь, что часть постов получает дату публикации в будущем.'
+    )
+    assert not FeedEntry.objects.filter(
+        category__is_published=False
+    ).exists()
+    counts = sorted(
+        Post.objects.values_list('comment_count', flat=True), reverse=True
+    )
+    assert counts == sorted(
+        Post.objects.annotate(total=Count('comments')).values_list(
+            'total', flat=True
+        ), reverse=True
+    )
+    assert counts[0] > 10 * counts[len(counts) // 2], (
+        'Убедитесь, что комментарии распределены по закону Ципфа.'
+    )
+
+
+def test_seed_twice_keeps_names_unique():
+    seed(users=3, posts=3, comments=3, categories=2, locations=1)
+    seed(users=3, posts=3, comments=3, categories=2, locations=1,
+         random_seed=1)
+    assert Category.objects.count() == 4
+
+
+def test_choice_stream_uniform_without_skew():
+    stream = choice_stream(random.Random(0), [1, 2], size=10)
+    picks = [next(stream) for _ in range(1000)]
+    assert 400 < picks.count(1) < 600
+
+
+def test_bulk_insert_returns_ids_only_on_request(
+        user, post_with_published_location
+):
+    def make(i):
+        return Comment(
+            text=f'Комментарий {i}', author=user,
+            post=post_with_published_location,
+        )
+
+    assert bulk_insert(Comment, 3, make) is None, (
+        'Убедитесь, что id комментариев не собираются в память.'
+    )
+    assert len(bulk_insert(Comment, 2, make, return_ids=True)) == 2
@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, connections
+
+from blog.benchmark import run_write_benchmark
+from blog.sqlite import apply_pragmas, read_pragmas
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='Профиль только для SQLite.'
+)
+
+ALIAS = 'tuned_test'
+
+
+@pytest.mark.django_db
+def test_new_connections_get_profile_pragmas(settings, tmp_path):
+    settings.BLOG_SQLITE_PRAGMAS = settings.SQLITE_PROFILES['production']
+    connections.databases[ALIAS] = {
+        **connections.databases['default'],
+        'NAME': str(tmp_path / 'tuned.sqlite3'),
+        'TEST': {},
+    }
+    try:
+        with connections[ALIAS].cursor() as cursor:
+            pragmas = read_pragmas(cursor)
+    finally:
+        connections[ALIAS].close()
+        del connections[ALIAS]
+        del connections.databases[ALIAS]
+    assert pragmas == {
+        'journal_mode': 'wal',
+        'synchronous': 1,
+        'busy_timeout': 5000,
+        'cache_size': -64 * 1024,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 2,
+    }, 'Убедитесь, что PRAGMA профиля выполняются на новом соединении.'
+
+
+def test_unknown_pragma_is_rejected():
+    with pytest.raises(ImproperlyConfigured):
+        apply_pragmas(
+            sqlite3.connect(':memory:').cursor(),
+            {'journal_mode = WAL; DROP TABLE x; --': 1},
+        )
+
+
+def test_write_benchmark(settings, tmp_path):
+    result = run_write_benchmark(
+        str(tmp_path / 'bench.sqlite3'),
+        settings.SQLITE_PROFILES['production'],
+        writers=4, transactions=20, readers=1,
+    )
+    assert result['commits'] == 80
+    assert result['locked'] == 0
+    assert result['commits_per_s'] > 0
+    assert result['p95_ms'] >= result['p50_ms']
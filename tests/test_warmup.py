@@ -0,0 +1,44 @@
+import copy
+import logging
+
+from django.conf import settings
+from django.template import engines
+from django.test import override_settings
+
+from blogicum.warmup import precompile_templates
+
+
+def cached_loader_templates():
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]['APP_DIRS'] = False
+    templates[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+    return templates
+
+
+def test_precompile_fills_cached_loader():
+    with override_settings(TEMPLATES=cached_loader_templates()):
+        timings = dict(precompile_templates())
+        loader = engines['django'].engine.template_loaders[0]
+        cached = set(loader.get_template_cache)
+    expected = {
+        path.relative_to(settings.TEMPLATES_DIR).as_posix()
+        for path in settings.TEMPLATES_DIR.rglob('*.html')
+    }
+    assert set(timings) == expected
+    assert {'base.html', 'includes/post_card.html'} <= cached, (
+        'Убедитесь, что при старте шаблоны попадают в кеширующий загрузчик.'
+    )
+    assert all(elapsed >= 0 for elapsed in timings.values())
+
+
+def test_boot_report_reaches_a_handler():
+    logger = logging.getLogger('blogicum.warmup')
+    assert logger.isEnabledFor(logging.INFO) and any(
+        handler.level <= logging.INFO
+        for handler in logging.getLogger('blogicum').handlers
+    ), 'Убедитесь, что отчёт о прогреве шаблонов выводится в лог воркера.'
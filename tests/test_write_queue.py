@@ -0,0 +1,134 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.db import IntegrityError, transaction
+
+from blog.models import Comment
+from blog.writer import run_write, writer
+
+
+@pytest.fixture
+def write_queue(settings):
+    settings.BLOG_WRITE_QUEUE = True
+    settings.BLOG_WRITE_WINDOW = 0.2
+    yield writer
+    writer.stop()
+
+
+def in_threads(*targets):
+    results = [None] * len(targets)
+
+    def call(index, target):
+        try:
+            results[index] = target()
+        except Exception as error:
+            results[index] = error
+
+    threads = [
+        threading.Thread(target=call, args=(index, target))
+        for index, target in enumerate(targets)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def comment_writer(post, author, text, **fields):
+    return lambda: run_write(
+        Comment.objects.create, post=post, author=author, text=text, **fields
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_writes_share_commit(
+        write_queue, user, post_with_published_location
+):
+    post = post_with_published_location
+    commits = write_queue.commits
+    comments = in_threads(*(
+        comment_writer(post, user, f'Комментарий {index}')
+        for index in range(8)
+    ))
+    assert all(isinstance(comment, Comment) for comment in comments)
+    assert len({comment.pk for comment in comments}) == 8, (
+        'Убедитесь, что каждая запись получает id своего объекта.'
+    )
+    assert Comment.objects.filter(post=post).count() == 8
+    assert write_queue.commits - commits < 8, (
+        'Убедитесь, что одновременные записи объединяются в один коммит.'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_write_does_not_break_batch(
+        write_queue, user, post_with_published_location
+):
+    post = post_with_published_location
+    good, missing_post = in_threads(
+        comment_writer(post, user, 'Верный'),
+        comment_writer(None, user, 'Без поста', post_id=10 ** 6),
+    )
+    assert isinstance(good, Comment)
+    assert isinstance(missing_post, IntegrityError), (
+        'Убедитесь, что ошибка записи возвращается её запросу.'
+    )
+    assert list(Comment.objects.values_list('text', flat=True)) == [
+        'Верный'
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_side_effects_run_once_after_commit(
+        write_queue, user, post_with_published_location
+):
+    effects = []
+
+    def comment_with_effect(text, **fields):
+        comment = Comment.objects.create(author=user, text=text, **fields)
+        transaction.on_commit(lambda: effects.append(text))
+        return comment
+
+    in_threads(
+        lambda: run_write(
+            comment_with_effect, 'Верный', post=post_with_published_location
+        ),
+        lambda: run_write(
+            comment_with_effect, 'Без поста', post_id=10 ** 6
+        ),
+    )
+    assert effects == ['Верный'], (
+        'Убедитесь, что побочные эффекты записи выполняются один раз '
+        'и только после её коммита.'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_view_writes_through_queue(
+        write_queue, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    writes = write_queue.writes
+    response = user_client.post(
+        f'/posts/{post.pk}/comment/', {'text': 'Через очередь'}
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url == f'/posts/{post.pk}/'
+    assert write_queue.writes == writes + 1, (
+        'Убедитесь, что комментарий сохраняется через очередь записи.'
+    )
+    assert Comment.objects.get().text == 'Через очередь'
+
+
+@pytest.mark.django_db
+def test_write_inside_transaction_runs_inline(
+        write_queue, user, post_with_published_location
+):
+    writes = write_queue.writes
+    comment = comment_writer(post_with_published_location, user, 'Сразу')()
+    assert comment.pk is not None
+    assert write_queue.writes == writes, (
+        'Убедитесь, что внутри транзакции запись не уходит в очередь.'
+    )